@@ -1,12 +1,12 @@
 import asyncio
 import datetime
+import functools
 import hashlib
 import time
 import uuid
 from collections import defaultdict
 from urllib.parse import quote, unquote
 
-import PTT
 import aiohttp
 import httpx
 
@@ -20,30 +20,39 @@ from fastapi.responses import (
 )
 
 from starlette.background import BackgroundTask
-from RTN import Torrent, sort_torrents, parse
 from starlette.responses import FileResponse
 
 from comet.debrid.manager import getDebrid
+from comet.utils.breaker import breakers
+from comet.utils.cache import SingleFlight, caches
 from comet.utils.general import (
     config_check,
     get_debrid_extension,
     get_indexer_manager,
-    get_zilean,
+    get_zilean_results,
     get_torrentio,
     get_mediafusion,
-    filter,
-    get_torrent_hash,
+    cached_scrape,
+    gather_until,
+    get_cached_availability,
+    filter_titles,
+    cached_parse,
+    rank_titles,
+    resolve_torrent_hashes,
+    prefetch_torrent_links,
     translate,
     get_balanced_hashes,
-    format_title, add_uncached_files, get_localized_titles, get_language_codes, get_client_ip,
-    language_to_country_code, check_completion, short_encrypt,
-    add_torrent_to_cache, update_uncached_status, derive_debrid_key, search_imdb_id, is_video, clean_titles,
+    format_title, add_uncached_files, get_metadata, get_localized_titles, get_language_codes, get_client_ip,
+    language_to_country_code, check_completion, get_short_config,
+    add_torrent_to_cache, update_uncached_status, derive_debrid_key, search_imdb_id, prefetch_imdb_searches, is_video, clean_titles,
     catalog_config, build_custom_filename, generate_unified_streams, cache_download_link, debrid_services
 )
+from comet.utils.http import http_client
 from comet.utils.logger import logger
-from comet.utils.models import database, rtn, settings, trackers
+from comet.utils.models import database, settings, trackers
 
 streams = APIRouter(prefix=f"{settings.URL_PREFIX}")
+stream_jobs = SingleFlight()
 
 
 @streams.get("/stream/{type}/{id}.json")
@@ -91,10 +100,7 @@ async def stream(
             "cacheMaxAge": 0
         }
 
-    connector = aiohttp.TCPConnector(limit=0)
-    async with aiohttp.ClientSession(
-            connector=connector, raise_for_status=True
-    ) as session:
+    async with http_client.scoped() as session:
         debrid = getDebrid(session, config, get_client_ip(request))
         debrid_config = catalog_config[config["debridService"]]
         debrid_filter = debrid_config["preview_filter"]
@@ -108,7 +114,7 @@ async def stream(
         for idx, file in enumerate(filter_files):
             try:
                 file["Title"] = unquote(file["Title"])
-                parsed = parse(file["Title"])
+                parsed = cached_parse(file["Title"])
                 clean_title = clean_titles(parsed.parsed_title)
             except Exception as e:
                 clean_title = f"error_{idx}"  # Unique key for failed parses
@@ -135,6 +141,7 @@ async def stream(
                     return None
 
         unique_titles = [t for t in title_groups.keys() if not t.startswith("error_")]
+        await prefetch_imdb_searches(unique_titles)
         imdb_results = await asyncio.gather(*[fetch_imdb(t) for t in unique_titles])
         title_to_imdb = dict(zip(unique_titles, imdb_results))
 
@@ -195,10 +202,7 @@ async def stream(
             "cacheMaxAge": 0
         }
 
-    connector = aiohttp.TCPConnector(limit=0)
-    async with aiohttp.ClientSession(
-            connector=connector, raise_for_status=True
-    ) as session:
+    async with http_client.scoped() as session:
         debrid = getDebrid(session, config, get_client_ip(request))
         debrid_id = id.split("-")[-1]
 
@@ -226,18 +230,11 @@ async def stream(
         filename = unquote(filename)
         torrent_id = debrid_torrent_id_getter(torrent)
         info_hash = debrid_hash_getter(torrent)
-        parsed_data = parse(filename)
+        parsed_data = cached_parse(filename)
 
         imdb_data = await search_imdb_id(clean_titles(parsed_data.parsed_title), session)
 
-        short_config = b64config
-        if settings.TOKEN:
-            short_config = {
-                "debridApiKey": config["debridApiKey"],
-                "debridStreamProxyPassword": config["debridStreamProxyPassword"],
-                "debridService": config["debridService"]
-            }
-            short_config = short_encrypt(orjson.dumps(short_config).decode("utf-8"), settings.TOKEN)
+        short_config = get_short_config(config) if settings.TOKEN else b64config
 
         videos = []
         for i, file in enumerate(files):
@@ -246,7 +243,7 @@ async def stream(
             file_name = unquote(file_name)
 
             url_friendly_file = quote(file_name.replace('/', '-'), safe='')
-            parsed_data = parse(file_name)
+            parsed_data = cached_parse(file_name)
             binge_filename = build_custom_filename(vars(parsed_data))
             binge_hash = hashlib.sha1(binge_filename.encode('utf-8')).hexdigest()
             video_data = {
@@ -304,6 +301,250 @@ async def stream(
         return result
 
 
+async def scrape_and_rank(
+    session,
+    debrid,
+    config: dict,
+    type: str,
+    full_id: str,
+    name: str,
+    season: int,
+    episode: int,
+    kitsu: bool,
+    year: int,
+    year_end: int,
+    search_titles: dict,
+    search_titles_list: list,
+    aliases: dict,
+    log_name: str,
+):
+    """
+    Scrapes every configured source, filters, resolves hashes, checks debrid
+    availability and ranks the results. Returns the ranked files by info hash
+    and whether some scrapers missed the soft deadline.
+    """
+    indexer_manager_type = settings.INDEXER_MANAGER_TYPE
+
+    search_indexer = len(config["indexers"]) != 0
+    torrents = []
+    tasks = []
+    logger.info(
+        f"Titles gathered for searching {search_titles}"
+    )
+    if indexer_manager_type and search_indexer:
+        logger.info(
+            f"Start of {indexer_manager_type} search for {log_name} with indexers {config['indexers']}"
+        )
+
+        search_terms = search_titles_list
+        if type == "series":
+            series_search_terms = []
+            for titles in search_titles_list:
+                if not kitsu:
+                    series_search_terms.append(f"{name} S{season:02d}E{episode:02d}")
+                else:
+                    series_search_terms.append(f"{name} {episode}")
+            search_terms.extend(series_search_terms)
+        search_terms = list(dict.fromkeys(term.replace('-', ' ').replace('_', ' ') for term in reversed(search_terms)))[::-1]
+        tasks.extend(
+            get_indexer_manager(
+                session, indexer_manager_type, config["indexers"], term, config
+            )
+            for term in search_terms
+        )
+    else:
+        logger.info(
+            f"No indexer {'manager ' if not indexer_manager_type else ''}{'selected by user' if indexer_manager_type else 'defined'} for {log_name}"
+        )
+
+    search_titles_list = list(dict.fromkeys(title.replace('-', ' ').replace('_', ' ') for title in reversed(search_titles_list)))[::-1]
+    if settings.ZILEAN_URL and 'z' in config["scrapingPreference"]:
+        tasks.append(get_zilean_results(session, search_titles_list, log_name, season, episode))
+
+    if settings.SCRAPE_TORRENTIO and 't' in config["scrapingPreference"]:
+        tasks.append(cached_scrape("torrentio", full_id, functools.partial(get_torrentio, log_name, type, full_id)))
+    # Services Supported by get_first_files has to match "tracker" returned by get_first_files and config["debridService"]
+    if settings.DEBRID_TAKE_FIRST > 0:
+        if config["debridService"] in debrid_services:
+            tasks.append(debrid.get_first_files(settings.DEBRID_TAKE_FIRST))
+
+    if settings.SCRAPE_MEDIAFUSION:
+        tasks.append(cached_scrape("mediafusion", full_id, functools.partial(get_mediafusion, log_name, type, full_id)))
+
+    partial = False
+    if settings.SCRAPE_SOFT_DEADLINE > 0:
+        search_response, pending = await gather_until(tasks, settings.SCRAPE_SOFT_DEADLINE)
+        if pending:
+            partial = True
+            logger.info(
+                f"{pending} scrapers still running after {settings.SCRAPE_SOFT_DEADLINE}s for {log_name}, ranking the results found so far"
+            )
+    else:
+        search_response = await asyncio.gather(*tasks)
+    # Split the search_response into debrid and non-debrid entries
+    debrid_entries = []
+    non_debrid_entries = []
+    for results in search_response:
+        for entry in results:
+            if entry.get("Tracker") in debrid_services:
+                debrid_entries.append(entry)
+            else:
+                non_debrid_entries.append(entry)
+
+    # Process non-debrid entries first and track their InfoHashes
+    hash_to_indices = defaultdict(list)
+    torrents = []
+
+    for idx, entry in enumerate(non_debrid_entries):
+        torrents.append(entry)
+        info_hash = entry.get("InfoHash")
+        hash_to_indices[info_hash].append(idx)
+
+    # Process debrid entries to update existing trackers or add new entries
+    for entry in debrid_entries:
+        info_hash = entry.get("InfoHash")
+        if info_hash in hash_to_indices:
+            # Update all non-debrid entries with the same hash
+            for idx in hash_to_indices[info_hash]:
+                torrents[idx]["Tracker"] = entry["Tracker"]
+        else:
+            # Add the debrid entry if no existing entry
+            torrents.append(entry)
+            # Update the hash_to_indices to track the new entry
+            hash_to_indices[info_hash].append(len(torrents) - 1)
+
+    logger.info(
+        f"{len(torrents)} unique torrents found for {log_name}"
+        + (
+            " with "
+            + ", ".join(
+                part
+                for part in [
+                    indexer_manager_type,
+                    "Zilean" if settings.ZILEAN_URL else None,
+                    "Torrentio" if settings.SCRAPE_TORRENTIO else None,
+                    "MediaFusion" if settings.SCRAPE_MEDIAFUSION else None,
+                ]
+                if part
+            )
+            if any(
+                [
+                    indexer_manager_type,
+                    settings.ZILEAN_URL,
+                    settings.SCRAPE_TORRENTIO,
+                    settings.SCRAPE_MEDIAFUSION,
+                ]
+            )
+            else ""
+        )
+    )
+
+    if len(torrents) == 0:
+        return {}, partial
+
+    if settings.TITLE_MATCH_CHECK:
+        # Adjust aliases for RTN - Has to be key: list
+        aliases = {k: [v] if isinstance(v, str) else v for k, v in aliases.items()}
+
+        indexed_torrents = [(i, torrents[i]["Title"]) for i in range(len(torrents))]
+
+        remove_adult_content = (
+            settings.REMOVE_ADULT_CONTENT and config["removeTrash"]
+        )
+        indices_to_keep = await filter_titles(
+            indexed_torrents, search_titles_list, season, year, year_end, aliases, remove_adult_content
+        )
+
+        # Rebuild the torrents list with only the kept indices
+        torrents = [torrent for i, torrent in enumerate(torrents) if i in indices_to_keep]
+
+        logger.info(
+            f"{len(torrents)} torrents passed title match check for {log_name}"
+        )
+
+        if len(torrents) == 0:
+            return {}, partial
+
+    await prefetch_torrent_links(
+        [torrent["Link"] for torrent in torrents if torrent.get("InfoHash") is None and torrent.get("Link")]
+    )
+
+    torrent_hashes, skipped = await resolve_torrent_hashes(session, torrents, config["maxResults"])
+    if skipped:
+        logger.info(f"{skipped} .torrent downloads skipped for {log_name}, enough info hashes were found")
+    index_less = 0
+    for hash in torrent_hashes:
+        if not hash[1]:
+            del torrents[hash[0] - index_less]
+            index_less += 1
+            continue
+
+        torrents[hash[0] - index_less]["InfoHash"] = hash[1]
+
+    logger.info(f"{len(torrents)} info hashes found for {log_name}")
+
+    if len(torrents) == 0:
+        return {}, partial
+
+    files = await get_cached_availability(
+        debrid,
+        config["debridService"],
+        list({hash[1] for hash in torrent_hashes if hash[1] is not None}),
+        type,
+        season,
+        episode,
+        kitsu
+    )
+
+    len_files = len(files)
+    logger.info(
+        f"{len_files} cached files found on {config['debridService']} for {log_name}"
+    )
+
+    # Adds Uncached Files to files, based on config and cached results
+    allowed_tracker_ids = config.get('indexersUncached', [])
+    if allowed_tracker_ids:
+        await add_uncached_files(files, torrents, log_name, allowed_tracker_ids, season, episode, kitsu)
+
+    torrents_by_hash = {torrent["InfoHash"]: torrent for torrent in torrents}
+    sorted_ranked_files = await rank_titles(
+        [(hash, torrents_by_hash[hash]["Title"]) for hash in files if hash in torrents_by_hash]
+    )
+
+    len_sorted_ranked_files = len(sorted_ranked_files)
+
+    if len_sorted_ranked_files == 0:
+        return {}, partial
+
+    for hash in sorted_ranked_files:  # needed for caching
+        sorted_ranked_files[hash]["data"]["title"] = files[hash]["title"]
+        sorted_ranked_files[hash]["data"]["torrent_title"] = torrents_by_hash[hash]["Title"]
+        sorted_ranked_files[hash]["data"]["tracker"] = torrents_by_hash[hash]["Tracker"]
+        sorted_ranked_files[hash]["data"]["protocol"] = torrents_by_hash[hash].get("Protocol", "torrent")
+        sorted_ranked_files[hash]["data"]["size"] = files[hash]["size"]
+        sorted_ranked_files[hash]["data"]["uncached"] = files[hash]["uncached"]
+        if files[hash].get("complete") is None:
+            sorted_ranked_files[hash]["data"]["complete"] = sorted_ranked_files[hash]["data"]["complete"] or check_completion(sorted_ranked_files[hash]["data"]["raw_title"], season)
+        if torrents_by_hash[hash].get("Seeders"):
+            sorted_ranked_files[hash]["data"]["seeders"] = torrents_by_hash[hash].get("Seeders")
+
+        sorted_ranked_files[hash]["data"]["torrent_id"] = ""
+        sorted_ranked_files[hash]["data"]["container_id"] = ""
+        sorted_ranked_files[hash]["data"]["link"] = torrents_by_hash[hash].get("Link", "")
+        sorted_ranked_files[hash]["data"]["magnet"] = torrents_by_hash[hash].get("MagnetUri", "")
+
+        torrent_size = torrents_by_hash[hash]["Size"]
+        sorted_ranked_files[hash]["data"]["size"] = (
+            files[hash]["size"]
+        )
+        sorted_ranked_files[hash]["data"]["torrent_size"] = (
+            torrent_size if torrent_size else files[hash]["size"]
+        )
+        sorted_ranked_files[hash]["data"]["index"] = files[hash]["index"]
+
+    return sorted_ranked_files, partial
+
+
 @streams.get("/{b64config}/stream/{type}/{id}.json")
 async def stream(
     request: Request,
@@ -324,10 +565,7 @@ async def stream(
             ]
         }
 
-    connector = aiohttp.TCPConnector(limit=0)
-    async with aiohttp.ClientSession(
-        connector=connector, raise_for_status=True
-    ) as session:
+    async with http_client.scoped() as session:
         full_id = id
         season = None
         episode = None
@@ -337,41 +575,15 @@ async def stream(
             season = int(info[1])
             episode = int(info[2])
 
-        year = None
-        year_end = None
+        kitsu = id == "kitsu"
         try:
-            kitsu = False
-            if id == "kitsu":
-                kitsu = True
-                get_metadata = await session.get(
-                    f"https://kitsu.io/api/edge/anime/{season}"
-                )
-                metadata = await get_metadata.json()
-                name = metadata["data"]["attributes"]["canonicalTitle"]
-                search_titles = {'default': name}
+            metadata = await get_metadata(f"kitsu:{season}" if kitsu else id, session)
+            name = metadata["name"]
+            year = metadata["year"]
+            year_end = metadata["year_end"]
+            search_titles = {'default': name}
+            if kitsu:
                 season = 1
-            else:
-                get_metadata = await session.get(
-                    f"https://v3.sg.media-imdb.com/suggestion/a/{id}.json"
-                )
-                metadata = await get_metadata.json()
-                element = metadata["d"][
-                    0
-                    if metadata["d"][0]["id"]
-                    not in ["/imdbpicks/summer-watch-guide", "/emmys"]
-                    else 1
-                ]
-
-                for element in metadata["d"]:
-                    if "/" not in element["id"]:
-                        break
-
-                name = element["l"]
-                year = element.get("y")
-                if "yr" in element:
-                    year_end = int(element["yr"].split("-")[1])
-
-                search_titles = {'default': name}
         except Exception as e:
             logger.warning(f"Exception while getting metadata for {id}: {e}")
 
@@ -384,10 +596,10 @@ async def stream(
                     }
                 ]
             }
-        # Get aliases
-        language_codes = get_language_codes([language for language in PTT.parse.LANGUAGES_TRANSLATION_TABLE.values()])
-        country_codes = language_to_country_code(language_codes)
-        aliases = await get_localized_titles(language_codes, country_codes, id, session)
+        # Get aliases, only needed for search languages and the title match check
+        aliases = {}
+        if not kitsu and (config["searchLanguage"] or settings.TITLE_MATCH_CHECK):
+            aliases = await get_localized_titles(id, session)
 
         # Get Language Codes for searching
         search_language_codes = get_language_codes(config['searchLanguage'])
@@ -545,246 +757,33 @@ async def stream(
                 ]
             }
 
-        indexer_manager_type = settings.INDEXER_MANAGER_TYPE
-
-        search_indexer = len(config["indexers"]) != 0
-        torrents = []
-        tasks = []
-        logger.info(
-            f"Titles gathered for searching {search_titles}"
-        )
-        if indexer_manager_type and search_indexer:
-            logger.info(
-                f"Start of {indexer_manager_type} search for {log_name} with indexers {config['indexers']}"
-            )
-
-            search_terms = search_titles_list
-            if type == "series":
-                series_search_terms = []
-                for titles in search_titles_list:
-                    if not kitsu:
-                        series_search_terms.append(f"{name} S{season:02d}E{episode:02d}")
-                    else:
-                        series_search_terms.append(f"{name} {episode}")
-                search_terms.extend(series_search_terms)
-            search_terms = list(dict.fromkeys(term.replace('-', ' ').replace('_', ' ') for term in reversed(search_terms)))[::-1]
-            tasks.extend(
-                get_indexer_manager(
-                    session, indexer_manager_type, config["indexers"], term, config
-                )
-                for term in search_terms
-            )
-        else:
-            logger.info(
-                f"No indexer {'manager ' if not indexer_manager_type else ''}{'selected by user' if indexer_manager_type else 'defined'} for {log_name}"
-            )
-
-        search_titles_list = list(dict.fromkeys(title.replace('-', ' ').replace('_', ' ') for title in reversed(search_titles_list)))[::-1]
-        if settings.ZILEAN_URL and 'z' in config["scrapingPreference"]:
-            tasks.extend(
-                get_zilean(session, titles, log_name, season, episode)
-                for titles in search_titles_list
-            )
-
-        if settings.SCRAPE_TORRENTIO and 't' in config["scrapingPreference"]:
-            tasks.append(get_torrentio(log_name, type, full_id))
-        # Services Supported by get_first_files has to match "tracker" returned by get_first_files and config["debridService"]
-        if settings.DEBRID_TAKE_FIRST > 0:
-            if config["debridService"] in debrid_services:
-                tasks.append(debrid.get_first_files(settings.DEBRID_TAKE_FIRST))
-
-        if settings.SCRAPE_MEDIAFUSION:
-            tasks.append(get_mediafusion(log_name, type, full_id))
-
-        search_response = await asyncio.gather(*tasks)
-        # Split the search_response into debrid and non-debrid entries
-        debrid_entries = []
-        non_debrid_entries = []
-        for results in search_response:
-            for entry in results:
-                if entry.get("Tracker") in debrid_services:
-                    debrid_entries.append(entry)
-                else:
-                    non_debrid_entries.append(entry)
-
-        # Process non-debrid entries first and track their InfoHashes
-        hash_to_indices = defaultdict(list)
-        torrents = []
-
-        for idx, entry in enumerate(non_debrid_entries):
-            torrents.append(entry)
-            info_hash = entry["InfoHash"]
-            hash_to_indices[info_hash].append(idx)
-
-        # Process debrid entries to update existing trackers or add new entries
-        for entry in debrid_entries:
-            info_hash = entry["InfoHash"]
-            if info_hash in hash_to_indices:
-                # Update all non-debrid entries with the same hash
-                for idx in hash_to_indices[info_hash]:
-                    torrents[idx]["Tracker"] = entry["Tracker"]
-            else:
-                # Add the debrid entry if no existing entry
-                torrents.append(entry)
-                # Update the hash_to_indices to track the new entry
-                hash_to_indices[info_hash].append(len(torrents) - 1)
-
-        logger.info(
-            f"{len(torrents)} unique torrents found for {log_name}"
-            + (
-                " with "
-                + ", ".join(
-                    part
-                    for part in [
-                        indexer_manager_type,
-                        "Zilean" if settings.ZILEAN_URL else None,
-                        "Torrentio" if settings.SCRAPE_TORRENTIO else None,
-                        "MediaFusion" if settings.SCRAPE_MEDIAFUSION else None,
-                    ]
-                    if part
-                )
-                if any(
-                    [
-                        indexer_manager_type,
-                        settings.ZILEAN_URL,
-                        settings.SCRAPE_TORRENTIO,
-                        settings.SCRAPE_MEDIAFUSION,
-                    ]
-                )
-                else ""
-            )
-        )
-
-        if len(torrents) == 0:
-            return {"streams": []}
-
-        if settings.TITLE_MATCH_CHECK:
-            # Adjust aliases for RTN - Has to be key: list
-            aliases = {k: [v] if isinstance(v, str) else v for k, v in aliases.items()}
-
-            indexed_torrents = [(i, torrents[i]["Title"]) for i in range(len(torrents))]
-            chunk_size = 50
-            chunks = [
-                indexed_torrents[i : i + chunk_size]
-                for i in range(0, len(indexed_torrents), chunk_size)
-            ]
-
-            remove_adult_content = (
-                settings.REMOVE_ADULT_CONTENT and config["removeTrash"]
-            )
-            tasks = []
-            for chunk in chunks:
-                tasks.append(
-                    filter(chunk, search_titles_list, season, year, year_end, aliases, remove_adult_content)
-                )
-
-            filtered_torrents = await asyncio.gather(*tasks)
-
-            # Collect indices of torrents that should be kept
-            indices_to_keep = set()
-            for result in filtered_torrents:
-                for filtered in result:
-                    if filtered[1]:  # Torrent passes the filter
-                        indices_to_keep.add(filtered[0])
-
-            # Rebuild the torrents list with only the kept indices
-            torrents = [torrent for i, torrent in enumerate(torrents) if i in indices_to_keep]
-
-            logger.info(
-                f"{len(torrents)} torrents passed title match check for {log_name}"
-            )
-
-            if len(torrents) == 0:
-                return {"streams": []}
-
-        tasks = []
-        for i in range(len(torrents)):
-            tasks.append(get_torrent_hash(session, (i, torrents[i])))
-
-        torrent_hashes = await asyncio.gather(*tasks)
-        index_less = 0
-        for hash in torrent_hashes:
-            if not hash[1]:
-                del torrents[hash[0] - index_less]
-                index_less += 1
-                continue
-
-            torrents[hash[0] - index_less]["InfoHash"] = hash[1]
-
-        logger.info(f"{len(torrents)} info hashes found for {log_name}")
-
-        if len(torrents) == 0:
-            return {"streams": []}
-
-        files = await debrid.get_files(
-            list({hash[1] for hash in torrent_hashes if hash[1] is not None}),
+        # Identical concurrent requests share a single scrape and rank job
+        flight_key = (
             type,
-            season,
-            episode,
-            kitsu
+            full_id,
+            tuple(sorted(indexers)),
+            config["debridService"],
+            config["scrapingPreference"],
+            tuple(config["searchLanguage"]),
+            tuple(sorted(config["indexersUncached"])),
+            config["removeTrash"],
+            # Hash resolution stops after a multiple of maxResults downloads
+            config["maxResults"],
+            # The user's own debrid library is part of the results
+            derive_debrid_key(config["debridApiKey"]) if settings.DEBRID_TAKE_FIRST > 0 else None,
         )
-
-        len_files = len(files)
-        logger.info(
-            f"{len_files} cached files found on {config['debridService']} for {log_name}"
+        sorted_ranked_files, partial = await stream_jobs.do(
+            flight_key,
+            lambda: scrape_and_rank(
+                session, debrid, config, type, full_id, name, season, episode, kitsu,
+                year, year_end, search_titles, search_titles_list, aliases, log_name,
+            ),
         )
-
-        # Adds Uncached Files to files, based on config and cached results
-        allowed_tracker_ids = config.get('indexersUncached', [])
-        if allowed_tracker_ids:
-            await add_uncached_files(files, torrents, log_name, allowed_tracker_ids, season, episode, kitsu)
-
-        ranked_files = set()
-        torrents_by_hash = {torrent["InfoHash"]: torrent for torrent in torrents}
-        for hash in files:
-            try:
-                ranked_file = rtn.rank(
-                    torrents_by_hash[hash]["Title"],
-                    hash,
-                    remove_trash=False,  # user can choose if he wants to remove it
-                )
-
-                ranked_files.add(ranked_file)
-            except Exception as e:
-                logger.error(e)
-                pass
-
-        sorted_ranked_files = sort_torrents(ranked_files)
-
-        len_sorted_ranked_files = len(sorted_ranked_files)
-
-        if len_sorted_ranked_files == 0:
+        if not sorted_ranked_files:
             return {"streams": []}
 
-        sorted_ranked_files = {
-            key: (value.model_dump() if isinstance(value, Torrent) else value)
-            for key, value in sorted_ranked_files.items()
-        }
-        for hash in sorted_ranked_files:  # needed for caching
-            sorted_ranked_files[hash]["data"]["title"] = files[hash]["title"]
-            sorted_ranked_files[hash]["data"]["torrent_title"] = torrents_by_hash[hash]["Title"]
-            sorted_ranked_files[hash]["data"]["tracker"] = torrents_by_hash[hash]["Tracker"]
-            sorted_ranked_files[hash]["data"]["protocol"] = torrents_by_hash[hash].get("Protocol", "torrent")
-            sorted_ranked_files[hash]["data"]["size"] = files[hash]["size"]
-            sorted_ranked_files[hash]["data"]["uncached"] = files[hash]["uncached"]
-            if files[hash].get("complete") is None:
-                sorted_ranked_files[hash]["data"]["complete"] = sorted_ranked_files[hash]["data"]["complete"] or check_completion(sorted_ranked_files[hash]["data"]["raw_title"], season)
-            if torrents_by_hash[hash].get("Seeders"):
-                sorted_ranked_files[hash]["data"]["seeders"] = torrents_by_hash[hash].get("Seeders")
-
-            sorted_ranked_files[hash]["data"]["torrent_id"] = ""
-            sorted_ranked_files[hash]["data"]["container_id"] = ""
-            sorted_ranked_files[hash]["data"]["link"] = torrents_by_hash[hash].get("Link", "")
-            sorted_ranked_files[hash]["data"]["magnet"] = torrents_by_hash[hash].get("MagnetUri", "")
-
-            torrent_size = torrents_by_hash[hash]["Size"]
-            sorted_ranked_files[hash]["data"]["size"] = (
-                files[hash]["size"]
-            )
-            sorted_ranked_files[hash]["data"]["torrent_size"] = (
-                torrent_size if torrent_size else files[hash]["size"]
-            )
-            sorted_ranked_files[hash]["data"]["index"] = files[hash]["index"]
+        # Every waiter gets its own copy, streams generation and caching mutate it
+        sorted_ranked_files = orjson.loads(orjson.dumps(sorted_ranked_files))
 
         debrid_extension = get_debrid_extension(config["debridService"])
 
@@ -815,11 +814,13 @@ async def stream(
             debrid_extension=debrid_extension,
         )
 
-        background_tasks.add_task(
-            add_torrent_to_cache, config, name, season, episode, sorted_ranked_files, balanced_hashes
-        )
+        # Partial results are not cached, the next request picks up the late scrapers from the scrape cache
+        if not partial:
+            background_tasks.add_task(
+                add_torrent_to_cache, config, name, season, episode, sorted_ranked_files, balanced_hashes
+            )
 
-        logger.info(f"Results have been cached for {log_name}")
+            logger.info(f"Results have been cached for {log_name}")
 
         return {"streams": results}
 
@@ -850,6 +851,22 @@ async def active_connections(request: Request, password: str):
     }
 
 
+@streams.get("/cache-stats", response_class=CustomORJSONResponse)
+async def cache_stats(request: Request, password: str):
+    if password != settings.DASHBOARD_ADMIN_PASSWORD:
+        return "Invalid Password"
+
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@streams.get("/circuit-breakers", response_class=CustomORJSONResponse)
+async def circuit_breakers(request: Request, password: str):
+    if password != settings.DASHBOARD_ADMIN_PASSWORD:
+        return "Invalid Password"
+
+    return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
 @streams.get("/{b64config}/playback/{hash}/{index}/{file_name}")
 async def playback(request: Request, b64config: str, hash: str, index: str):
     config = config_check(b64config)
@@ -870,7 +887,7 @@ async def playback(request: Request, b64config: str, hash: str, index: str):
         config["debridService"] = settings.PROXY_DEBRID_STREAM_DEBRID_DEFAULT_SERVICE
         config["debridApiKey"] = settings.PROXY_DEBRID_STREAM_DEBRID_DEFAULT_APIKEY
 
-    async with aiohttp.ClientSession(raise_for_status=True) as session:
+    async with http_client.scoped() as session:
         # Check for cached download link
         cached_link = await database.fetch_one(
             f"SELECT link, timestamp FROM download_links WHERE debrid_key = '{config['debridApiKey']}' AND hash = '{hash}' AND file_index = '{index}'"
@@ -984,6 +1001,8 @@ async def playback(request: Request, b64config: str, hash: str, index: str):
                 else:
                     logger.warning(f"Exception while proxying {download_link}: {e}")
                     return
+            # Only the headers are needed, hand the connection back to the pool (or drop it if a body is pending)
+            response.release()
 
             if response.status == 206 or (
                 response.status == 200 and config["debridService"] == "torbox"
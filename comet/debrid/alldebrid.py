@@ -1,19 +1,19 @@
 import aiohttp
 import asyncio
 
-from RTN import parse
-
-from comet.utils.general import is_video, check_completion, check_uncached, uncached_db_find_container_id, \
+from comet.utils.general import check_completion, check_uncached, uncached_db_find_container_id, \
     update_container_id_uncached_db, update_torrent_id_uncached_db, uncached_select_index, check_index, \
-    extra_file_pattern
+    get_debrid_availability, select_debrid_files
+from comet.utils.http import ScopedSession
 from comet.utils.logger import logger
 from comet.utils.models import settings
 
 
 class AllDebrid:
-    def __init__(self, session: aiohttp.ClientSession, debrid_api_key: str):
-        session.headers["Authorization"] = f"Bearer {debrid_api_key}"
-        self.session = session
+    def __init__(self, session: ScopedSession, debrid_api_key: str):
+        self.session = session.scoped(
+            headers={"Authorization": f"Bearer {debrid_api_key}"}, upstream="debrid"
+        )
         self.proxy = None
 
         self.api_url = "http://api.alldebrid.com/v4"
@@ -45,9 +45,7 @@ class AllDebrid:
                 f"Exception while checking hashes instant availability on All-Debrid: {e}"
             )
 
-    async def get_files(
-        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
-    ):
+    async def get_availability(self, torrent_hashes: list):
         chunk_size = 500
         chunks = [
             torrent_hashes[i : i + chunk_size]
@@ -60,80 +58,31 @@ class AllDebrid:
 
         responses = await asyncio.gather(*tasks)
 
-        availability = [response for response in responses if response]
-
-        files = {}
-
-        if type == "series":
-            for result in availability:
-                if "status" not in result or result["status"] != "success":
-                    continue
-
-                for magnet in result["data"]["magnets"]:
-                    if not magnet["instant"]:
-                        continue
-
-                    for file in magnet["files"]:
-                        filename = file["n"]
-                        pack = False
-                        if "e" in file:  # PACK
-                            filename = file["e"][0]["n"]
-                            pack = True
-
-                        if not is_video(filename):
-                            continue
-
-                        if extra_file_pattern.search(filename):
-                            continue
+        availability = {}
+        for result in responses:
+            if not result or "status" not in result or result["status"] != "success":
+                continue
 
-                        filename_parsed = parse(filename)
-                        if episode not in filename_parsed.episodes:
-                            continue
+            for magnet in result["data"]["magnets"]:
+                files = []
+                for index, file in enumerate(magnet.get("files") or []):
+                    if "e" in file:  # PACK
+                        files.append({"index": index, "name": file["e"][0]["n"], "size": file["e"][0]["s"]})
+                    else:
+                        files.append({"index": index, "name": file["n"], "size": file["s"]})
 
-                        if kitsu:
-                            if filename_parsed.seasons:
-                                continue
-                        else:
-                            if season not in filename_parsed.seasons:
-                                continue
+                availability[magnet["hash"].lower()] = {
+                    "cached": bool(magnet["instant"]),
+                    "files": files,
+                }
 
-                        files[magnet["hash"]] = {
-                            "index": magnet["files"].index(file),
-                            "title": filename,
-                            "size": file["e"][0]["s"] if pack else file["s"],
-                            "uncached": False,
-                            "complete": None,
-                        }
+        return availability
 
-                        break
-        else:
-            for result in availability:
-                if "status" not in result or result["status"] != "success":
-                    continue
-
-                for magnet in result["data"]["magnets"]:
-                    if not magnet["instant"]:
-                        continue
-
-                    for file in magnet["files"]:
-                        filename = file["n"]
-
-                        if not is_video(filename):
-                            continue
-
-                        if extra_file_pattern.search(filename):
-                            continue
-
-                        files[magnet["hash"]] = {
-                            "index": magnet["files"].index(file),
-                            "title": filename,
-                            "size": file["s"],
-                            "uncached": False,
-                        }
-
-                        break
-
-        return files
+    async def get_files(
+        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
+    ):
+        availability = await get_debrid_availability("alldebrid", self.get_availability, torrent_hashes)
+        return select_debrid_files(availability, type, season, episode, kitsu), set(availability)
 
     async def get_first_files(self, amount: int):
         results = []
@@ -1,19 +1,19 @@
-import aiohttp
 import asyncio
 
-from RTN import parse
 from aiohttp import FormData
 
-from comet.utils.general import is_video, check_uncached, remove_file_extension, update_torrent_id_uncached_db, \
+from comet.utils.general import check_uncached, remove_file_extension, update_torrent_id_uncached_db, \
     update_container_id_uncached_db, uncached_db_find_container_id, uncached_select_index, check_index, \
-    extra_file_pattern
+    get_debrid_availability, select_debrid_files
+from comet.utils.http import ScopedSession
 from comet.utils.logger import logger
 
 
 class DebridLink:
-    def __init__(self, session: aiohttp.ClientSession, debrid_api_key: str):
-        session.headers["Authorization"] = f"Bearer {debrid_api_key}"
-        self.session = session
+    def __init__(self, session: ScopedSession, debrid_api_key: str):
+        self.session = session.scoped(
+            headers={"Authorization": f"Bearer {debrid_api_key}"}, upstream="debrid"
+        )
         self.proxy = None
 
         self.api_url = "https://debrid-link.com/api/v2"
@@ -47,7 +47,8 @@ class DebridLink:
                 add_torrent = await add_torrent.json()
 
                 torrent_id = add_torrent["value"]["id"]
-                await self.session.delete(f"{self.api_url}/seedbox/{torrent_id}/remove")
+                remove_torrent = await self.session.delete(f"{self.api_url}/seedbox/{torrent_id}/remove")
+                remove_torrent.release()
 
                 responses.append(add_torrent)
             except:
@@ -84,9 +85,7 @@ class DebridLink:
                 f"Exception while getting recent files on Debrid Link: {e}"
             )
 
-    async def get_files(
-            self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
-    ):
+    async def get_availability(self, torrent_hashes: list):
         chunk_size = 10
         chunks = [
             torrent_hashes[i: i + chunk_size]
@@ -99,72 +98,27 @@ class DebridLink:
 
         responses = await asyncio.gather(*tasks)
 
-        availability = []
+        # Hashes that could not be added are left out and checked again next time
+        availability = {}
         for response_list in responses:
-            for response in response_list:
-                availability.append(response)
-
-        files = {}
-
-        if type == "series":
-            for result in availability:
-                torrent_files = result["value"]["files"]
-                for file in torrent_files:
-                    if file["downloadPercent"] != 100:
-                        continue
-
-                    filename = file["name"]
-
-                    if not is_video(filename):
-                        continue
-
-                    if extra_file_pattern.search(filename):
-                        continue
-
-                    filename_parsed = parse(filename)
-                    if episode not in filename_parsed.episodes:
-                        continue
-
-                    if kitsu:
-                        if filename_parsed.seasons:
-                            continue
-                    else:
-                        if season not in filename_parsed.seasons:
-                            continue
-
-                    files[result["value"]["hashString"]] = {
-                        "index": torrent_files.index(file),
-                        "title": filename,
-                        "size": file["size"],
-                        "uncached": False,
-                        "complete": None,
-                    }
-
-                    break
-        else:
-            for result in availability:
+            for result in response_list:
                 value = result["value"]
-                torrent_files = value["files"]
-                for file in torrent_files:
-                    if file["downloadPercent"] != 100:
-                        continue
-
-                    filename = file["name"]
+                availability[value["hashString"].lower()] = {
+                    "cached": True,
+                    "files": [
+                        {"index": index, "name": file["name"], "size": file["size"]}
+                        for index, file in enumerate(value["files"])
+                        if file["downloadPercent"] == 100
+                    ],
+                }
 
-                    if not is_video(filename):
-                        continue
+        return availability
 
-                    if extra_file_pattern.search(filename):
-                        continue
-
-                    files[value["hashString"]] = {
-                        "index": torrent_files.index(file),
-                        "title": filename,
-                        "size": file["size"],
-                        "uncached": False,
-                    }
-
-        return files
+    async def get_files(
+            self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
+    ):
+        availability = await get_debrid_availability("debridlink", self.get_availability, torrent_hashes)
+        return select_debrid_files(availability, type, season, episode, kitsu), set(availability)
 
     async def add_magnet(self, hash: str):
         add_torrent = await self.session.post(
@@ -1,4 +1,4 @@
-import aiohttp
+from comet.utils.http import ScopedSession
 
 from .realdebrid import RealDebrid
 from .alldebrid import AllDebrid
@@ -7,7 +7,7 @@ from .torbox import TorBox
 from .debridlink import DebridLink
 
 
-def getDebrid(session: aiohttp.ClientSession, config: dict, ip: str):
+def getDebrid(session: ScopedSession, config: dict, ip: str):
     debrid_service = config["debridService"]
     debrid_api_key = config["debridApiKey"]
     if debrid_service == "realdebrid":
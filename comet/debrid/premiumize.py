@@ -1,17 +1,17 @@
 import aiohttp
 import asyncio
 
-from RTN import parse
 
 from comet.utils.general import is_video, check_completion, check_uncached, uncached_db_find_container_id, \
     update_container_id_uncached_db, update_torrent_id_uncached_db, uncached_select_index, check_index, \
-    extra_file_pattern
+    classify_file, get_debrid_availability, cached_parse
+from comet.utils.http import ScopedSession
 from comet.utils.logger import logger
 
 
 class Premiumize:
-    def __init__(self, session: aiohttp.ClientSession, debrid_api_key: str):
-        self.session = session
+    def __init__(self, session: ScopedSession, debrid_api_key: str):
+        self.session = session.scoped(upstream="debrid")
         self.proxy = None
 
         self.api_url = "https://premiumize.me/api"
@@ -50,9 +50,7 @@ class Premiumize:
                 f"Exception while checking hash instant availability on Premiumize: {e}"
             )
 
-    async def get_files(
-        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
-    ):
+    async def get_availability(self, torrent_hashes: list):
         chunk_size = 100
         chunks = [
             torrent_hashes[i : i + chunk_size]
@@ -65,83 +63,66 @@ class Premiumize:
 
         responses = await asyncio.gather(*tasks)
 
-        availability = []
-        for response in responses:
-            if not response:
+        # Premiumize only reports the name and size of the main file of each torrent
+        availability = {}
+        for result in responses:
+            if not result or result["status"] != "success":
                 continue
 
-            availability.append(response)
+            for index, hash in enumerate(result["hashes"]):
+                availability[hash.lower()] = {
+                    "cached": bool(result["response"][index]) and bool(result["filesize"][index]),
+                    "files": [
+                        {"index": 0, "name": result["filename"][index], "size": result["filesize"][index]}
+                    ],
+                }
 
-        files = {}
-
-        if type == "series":
-            for result in availability:
-                if result["status"] != "success":
-                    continue
+        return availability
 
-                responses = result["response"]
-                filenames = result["filename"]
-                filesizes = result["filesize"]
-                hashes = result["hashes"]
-                for index, response in enumerate(responses):
-                    if not response:
-                        continue
-
-                    if not filesizes[index]:
-                        continue
+    async def get_files(
+        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
+    ):
+        availability = await get_debrid_availability("premiumize", self.get_availability, torrent_hashes)
 
-                    filename = filenames[index]
+        files = {}
+        for hash, hash_availability in availability.items():
+            if not hash_availability["cached"]:
+                continue
 
-                    if extra_file_pattern.search(filename):
-                        continue
+            file = hash_availability["files"][0]
+            filename = file["name"]
 
-                    filename_parsed = parse(filename)
-                    if episode not in filename_parsed.episodes:
-                        continue
+            if classify_file(filename)[1]:
+                continue
 
-                    if kitsu:
-                        if filename_parsed.seasons:
-                            continue
-                    else:
-                        if season not in filename_parsed.seasons:
-                            continue
-
-                    files[hashes[index]] = {
-                        "index": f"{season}|{episode}",
-                        "title": filename,
-                        "size": int(filesizes[index]),
-                        "uncached": False,
-                        "complete": None,
-                    }
-        else:
-            for result in availability:
-                if result["status"] != "success":
+            if type == "series":
+                filename_parsed = cached_parse(filename)
+                if episode not in filename_parsed.episodes:
                     continue
 
-                responses = result["response"]
-                filenames = result["filename"]
-                filesizes = result["filesize"]
-                hashes = result["hashes"]
-                for index, response in enumerate(responses):
-                    if response is False:
+                if kitsu:
+                    if filename_parsed.seasons:
                         continue
-
-                    if not filesizes[index]:
+                else:
+                    if season not in filename_parsed.seasons:
                         continue
 
-                    filename = filenames[index]
-
-                    if extra_file_pattern.search(filename):
-                        continue
-
-                    files[hashes[index]] = {
-                        "index": 0,
-                        "title": filename,
-                        "size": int(filesizes[index]),
-                        "uncached": False,
-                    }
+                files[hash] = {
+                    "index": f"{season}|{episode}",
+                    "title": filename,
+                    "size": int(file["size"]),
+                    "uncached": False,
+                    "complete": None,
+                }
+            else:
+                files[hash] = {
+                    "index": 0,
+                    "title": filename,
+                    "size": int(file["size"]),
+                    "uncached": False,
+                }
 
-        return files
+        return files, set(availability)
 
     async def add_magnet(self, hash: str):
         add_magnet = await self.session.post(
@@ -211,7 +192,7 @@ class Premiumize:
                 continue
 
             if season is not None:
-                filename_parsed = parse(filename)
+                filename_parsed = cached_parse(filename)
                 if (
                         season in filename_parsed.seasons
                         and episode in filename_parsed.episodes
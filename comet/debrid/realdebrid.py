@@ -1,19 +1,18 @@
-import aiohttp
 import asyncio
 
-from RTN import parse
-
 from comet.utils.general import is_video, check_uncached, check_completion, remove_file_extension, \
     update_container_id_uncached_db, update_torrent_id_uncached_db, uncached_db_find_container_id, \
-    uncached_select_index, check_index, extra_file_pattern
+    uncached_select_index, check_index, get_debrid_availability, select_debrid_files
+from comet.utils.http import ScopedSession
 from comet.utils.logger import logger
 from comet.utils.models import settings, database
 
 
 class RealDebrid:
-    def __init__(self, session: aiohttp.ClientSession, debrid_api_key: str, ip: str):
-        session.headers["Authorization"] = f"Bearer {debrid_api_key}"
-        self.session = session
+    def __init__(self, session: ScopedSession, debrid_api_key: str, ip: str):
+        self.session = session.scoped(
+            headers={"Authorization": f"Bearer {debrid_api_key}"}, upstream="debrid"
+        )
         self.ip = ip
         self.proxy = None
 
@@ -72,9 +71,7 @@ class RealDebrid:
                 f"Exception while getting recent files on Real-Debrid: {e}"
             )
 
-    async def get_files(
-        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
-    ):
+    async def get_availability(self, torrent_hashes: list):
         chunk_size = 100
         chunks = [
             torrent_hashes[i : i + chunk_size]
@@ -88,75 +85,37 @@ class RealDebrid:
         responses = await asyncio.gather(*tasks)
 
         availability = {}
-        for response in responses:
+        for chunk, response in zip(chunks, responses):
             if isinstance(response, dict):
                 logger.warning(f"Exception while checking availability {response}")
                 return {}
-            if response is not None:
-                availability.update(response)
-
-        files = {}
+            if response is None:
+                continue
 
-        if type == "series":
-            for hash, details in availability.items():
-                if "rd" not in details:
-                    continue
+            for hash in chunk:
+                availability[hash] = {"cached": False, "files": []}
 
-                for variants in details["rd"]:
-                    for index, file in variants.items():
-                        filename = file["filename"]
-
-                        if not is_video(filename):
-                            continue
-
-                        if extra_file_pattern.search(filename):
-                            continue
-
-                        filename_parsed = parse(filename)
-                        if episode not in filename_parsed.episodes:
-                            continue
-
-                        if kitsu:
-                            if filename_parsed.seasons:
-                                continue
-                        else:
-                            if season not in filename_parsed.seasons:
-                                continue
-
-                        files[hash] = {
-                            "index": index,
-                            "title": filename,
-                            "size": file["filesize"],
-                            "uncached": False,
-                            "complete": None,
-                        }
-
-                        break
-        else:
-            for hash, details in availability.items():
+            for hash, details in response.items():
                 if "rd" not in details:
                     continue
 
-                for variants in details["rd"]:
-                    for index, file in variants.items():
-                        filename = file["filename"]
-
-                        if not is_video(filename):
-                            continue
-
-                        if extra_file_pattern.search(filename):
-                            continue
-
-                        files[hash] = {
-                            "index": index,
-                            "title": filename,
-                            "size": file["filesize"],
-                            "uncached": False,
-                        }
+                # Later variants take precedence, so they are listed first
+                availability[hash.lower()] = {
+                    "cached": True,
+                    "files": [
+                        {"index": index, "name": file["filename"], "size": file["filesize"]}
+                        for variants in reversed(details["rd"])
+                        for index, file in variants.items()
+                    ],
+                }
 
-                        break
+        return availability
 
-        return files
+    async def get_files(
+        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
+    ):
+        availability = await get_debrid_availability("realdebrid", self.get_availability, torrent_hashes)
+        return select_debrid_files(availability, type, season, episode, kitsu), set(availability)
 
     async def add_magnet(self, hash: str):
         # Handle magnet link as before
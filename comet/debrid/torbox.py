@@ -1,24 +1,27 @@
 import hashlib
-import time
 from typing import Optional
 from urllib.parse import unquote
 
 import aiohttp
 import asyncio
 
-from RTN import parse
-
-from comet.utils.general import is_video, check_completion, extra_file_pattern, check_uncached, check_index, \
+from comet.utils.cache import SingleFlight
+from comet.utils.general import check_completion, check_uncached, check_index, \
     uncached_db_find_container_id, update_container_id_uncached_db, update_torrent_id_uncached_db, \
-    uncached_select_index, find_next_episode, cache_download_link
+    uncached_select_index, find_next_episode, cache_download_link, poll_with_backoff, get_debrid_availability, \
+    select_debrid_files
+from comet.utils.http import ScopedSession, http_client
 from comet.utils.logger import logger
 from comet.utils.models import settings
 
+usenet_polls = SingleFlight()
+
 
 class TorBox:
-    def __init__(self, session: aiohttp.ClientSession, debrid_api_key: str):
-        session.headers["Authorization"] = f"Bearer {debrid_api_key}"
-        self.session = session
+    def __init__(self, session: ScopedSession, debrid_api_key: str):
+        self.session = session.scoped(
+            headers={"Authorization": f"Bearer {debrid_api_key}"}, upstream="debrid"
+        )
         self.proxy = None
 
         self.api_url = "https://api.torbox.app/v1/api"
@@ -48,9 +51,7 @@ class TorBox:
                 f"Exception while checking hash instant availability on TorBox: {e}"
             )
 
-    async def get_files(
-        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
-    ):
+    async def get_availability(self, torrent_hashes: list):
         chunk_size = 50
         chunks = [
             torrent_hashes[i : i + chunk_size]
@@ -63,72 +64,31 @@ class TorBox:
 
         responses = await asyncio.gather(*tasks)
 
-        availability = [response for response in responses if response is not None]
+        availability = {}
+        for chunk, result in zip(chunks, responses):
+            if result is None or not result["success"]:
+                continue
 
-        files = {}
+            # TorBox only lists the cached torrents of a chunk
+            for hash in chunk:
+                availability[hash] = {"cached": False, "files": []}
 
-        if type == "series":
-            for result in availability:
-                if not result["success"] or not result["data"]:
-                    continue
+            for torrent in result["data"] or []:
+                availability[torrent["hash"].lower()] = {
+                    "cached": True,
+                    "files": [
+                        {"index": index, "name": file["name"].split("/")[1], "size": file["size"]}
+                        for index, file in enumerate(torrent["files"])
+                    ],
+                }
 
-                for torrent in result["data"]:
-                    torrent_files = torrent["files"]
-                    for file in torrent_files:
-                        filename = file["name"].split("/")[1]
-
-                        if not is_video(filename):
-                            continue
-
-                        if extra_file_pattern.search(filename):
-                            continue
-
-                        filename_parsed = parse(filename)
-                        if episode not in filename_parsed.episodes:
-                            continue
-
-                        if kitsu:
-                            if filename_parsed.seasons:
-                                continue
-                        else:
-                            if season not in filename_parsed.seasons:
-                                continue
-
-                        files[torrent["hash"]] = {
-                            "index": torrent_files.index(file),
-                            "title": filename,
-                            "size": file["size"],
-                            "uncached": False,
-                            "complete": None,
-                        }
-
-                        break
-        else:
-            for result in availability:
-                if not result["success"] or not result["data"]:
-                    continue
+        return availability
 
-                for torrent in result["data"]:
-                    torrent_files = torrent["files"]
-                    for file in torrent_files:
-                        filename = file["name"].split("/")[1]
-
-                        if not is_video(filename):
-                            continue
-
-                        if extra_file_pattern.search(filename):
-                            continue
-
-                        files[torrent["hash"]] = {
-                            "index": torrent_files.index(file),
-                            "title": filename,
-                            "size": file["size"],
-                            "uncached": False,
-                        }
-
-                        break
-
-        return files
+    async def get_files(
+        self, torrent_hashes: list, type: str, season: str, episode: str, kitsu: bool
+    ):
+        availability = await get_debrid_availability("torbox", self.get_availability, torrent_hashes)
+        return select_debrid_files(availability, type, season, episode, kitsu), set(availability)
 
     async def get_first_files(self, amount: int, protocol: Optional[str] = "torrent"):
         results = []
@@ -291,35 +251,14 @@ class TorBox:
         magnet_info = magnet_info['data']
 
         if protocol == "usenet":
-            max_attempts = settings.USENET_REFRESH_ATTEMPTS
-
-            for attempt in range(max_attempts):
-                download_finished = magnet_info.get("download_finished")
-                files = magnet_info.get("files") or []
-
-                if download_finished and len(files) > 0:
-                    break
-
-                logger.info(
-                    f"File {hash}|{index} is still uncached, please wait."
-                    f" Status: {magnet_info.get('download_state')} |"
-                    f" Progress: {int(magnet_info.get('progress') * 100)}%. Attempt {attempt+1}/{max_attempts}"
+            if not (magnet_info.get("download_finished") and magnet_info.get("files")):
+                # Every playback request for this container waits on the same poll
+                magnet_info = await usenet_polls.do(
+                    (debrid_key, container_id),
+                    lambda: self.wait_for_usenet(container_id, hash, index, magnet_info),
                 )
-
-                time.sleep(4)
-
-                magnet_info_result = await self.get_info(container_id, None, protocol)
-                if not magnet_info_result or magnet_info_result['data'].get('download_state') == "failed":
-                    logger.warning(
-                        f"Exception while getting file from Torbox, please retry, for {hash}|{index}"
-                    )
+                if not magnet_info:
                     return None
-                magnet_info = magnet_info_result['data']
-            else:
-                logger.warning(
-                    f"Download was not finished after {max_attempts} attempts for {hash}|{index}"
-                )
-                return None
         else:
             if not magnet_info.get("download_finished") or not magnet_info.get("files"):
                 logger.info(
@@ -351,6 +290,38 @@ class TorBox:
             )
         return await self.get_download_link(torrent_id, container_id, protocol)
 
+    async def wait_for_usenet(self, container_id: str, hash: str, index: str, magnet_info: dict):
+        max_attempts = settings.USENET_REFRESH_ATTEMPTS
+
+        async def fetch():
+            magnet_info_result = await self.get_info(container_id, None, "usenet")
+            if not magnet_info_result or magnet_info_result['data'].get('download_state') == "failed":
+                logger.warning(
+                    f"Exception while getting file from Torbox, please retry, for {hash}|{index}"
+                )
+                return None
+            return magnet_info_result['data']
+
+        def log_wait(magnet_info: dict, attempt: int):
+            logger.info(
+                f"File {hash}|{index} is still uncached, please wait."
+                f" Status: {magnet_info.get('download_state')} |"
+                f" Progress: {int(magnet_info.get('progress') * 100)}%. Attempt {attempt+1}/{max_attempts}"
+            )
+
+        magnet_info, ready = await poll_with_backoff(
+            fetch,
+            lambda info: info.get("download_finished") and len(info.get("files") or []) > 0,
+            max_attempts,
+            on_wait=log_wait,
+            initial=magnet_info,
+        )
+        if magnet_info is not None and not ready:
+            logger.warning(
+                f"Download was not finished after {max_attempts} attempts for {hash}|{index}"
+            )
+        return magnet_info if ready else None
+
     async def handle_cached(self, hash: str, index: str, usenet_id: Optional[str] = None):
         if not usenet_id:
             torrent_data = await self.get_info(None, hash, "torrent")
@@ -386,9 +357,9 @@ class TorBox:
                     logger.info(f"⏳ [Background] Waiting 20s before retry ({attempt}/{max_attempts-1})")
                     await asyncio.sleep(20)
 
-                # Create new session for background task
-                async with aiohttp.ClientSession() as bg_session:
-                    # Create new TorBox instance with fresh session
+                # Scoped session on the shared pool for background task
+                async with http_client.scoped() as bg_session:
+                    # Create new TorBox instance with its own session scope
                     bg_torbox = TorBox(
                         session=bg_session,
                         debrid_api_key=self.debrid_api_key
@@ -17,7 +17,14 @@ from starlette.requests import Request
 from comet.api.core import main
 from comet.api.stream import streams
 from comet.utils.db import setup_database, teardown_database
-from comet.utils.general import cache_wipe
+from comet.utils.general import (
+    cache_wipe,
+    derive_key,
+    refresh_prowlarr_indexers,
+    shutdown_filter_executor,
+    warm_filter_executor,
+)
+from comet.utils.http import http_client
 from comet.utils.logger import logger
 from comet.utils.models import settings
 
@@ -42,12 +49,28 @@ class LoguruMiddleware(BaseHTTPMiddleware):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await setup_database()
+    await http_client.start()
+    if settings.TOKEN:
+        # Warm the key derivation so the first request does not pay for PBKDF2
+        derive_key(settings.TOKEN)
+    filter_warm_task_handle = None
+    if settings.TITLE_MATCH_CHECK:
+        filter_warm_task_handle = asyncio.create_task(warm_filter_executor())
     cache_wipe_task_handle = None
     if settings.CACHE_WIPE > 0:
         cache_wipe_task_handle = asyncio.create_task(cache_wipe_task())
+    prowlarr_indexers_task_handle = None
+    if settings.INDEXER_MANAGER_TYPE == "prowlarr" and settings.PROWLARR_INDEXERS_REFRESH > 0:
+        prowlarr_indexers_task_handle = asyncio.create_task(prowlarr_indexers_task())
     yield
     if settings.CACHE_WIPE > 0 and cache_wipe_task_handle:
         cache_wipe_task_handle.cancel()
+    if prowlarr_indexers_task_handle:
+        prowlarr_indexers_task_handle.cancel()
+    if filter_warm_task_handle:
+        filter_warm_task_handle.cancel()
+    shutdown_filter_executor()
+    await http_client.close()
     await teardown_database()
 
 
@@ -181,15 +204,30 @@ async def cache_wipe_task():
             logger.exception(f"Exception during cache cleanup: {e}")
 
 
-with server.run_in_thread():
-    start_log()
-    try:
-        while True:
-            time.sleep(1)  # Keep the main thread alive
-    except KeyboardInterrupt:
-        logger.log("COMET", "Server stopped by user")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        logger.exception(traceback.format_exc())
-    finally:
-        logger.log("COMET", "Server Shutdown")
+async def prowlarr_indexers_task():
+    while True:
+        try:
+            indexers = await refresh_prowlarr_indexers(http_client.scoped("indexer"))
+            logger.log("COMET", f"Prowlarr indexers refreshed: {len(indexers)} indexers")
+            await asyncio.sleep(settings.PROWLARR_INDEXERS_REFRESH)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.warning(f"Exception while refreshing Prowlarr indexers: {e}")
+            await asyncio.sleep(min(settings.PROWLARR_INDEXERS_REFRESH, 60))
+
+
+# Pool workers are spawned and import this module again, they must not start the server
+if __name__ == "__main__":
+    with server.run_in_thread():
+        start_log()
+        try:
+            while True:
+                time.sleep(1)  # Keep the main thread alive
+        except KeyboardInterrupt:
+            logger.log("COMET", "Server stopped by user")
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            logger.exception(traceback.format_exc())
+        finally:
+            logger.log("COMET", "Server Shutdown")
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from comet.utils.models import settings
+
+# Outcomes kept per upstream for the error rate and latency percentiles
+WINDOW_SIZE = 50
+# Calls needed before the error rate or the latencies are trusted
+MIN_CALLS = 10
+# Adaptive timeouts never go below this many seconds
+MIN_TIMEOUT = 2
+
+# Every breaker registers itself here so the admin endpoint can report on it
+breakers = {}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_upstream_failure(error: Exception):
+    """
+    Timeouts, connection errors, rate limits and server errors count against an
+    upstream. Other HTTP errors (an unknown id, a bad request) are answers to that
+    one call and say nothing about its health.
+    """
+    # aiohttp errors carry the status, curl_cffi errors carry the response
+    status = getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status:
+        return status >= 500 or status == 429
+
+    return isinstance(error, (TimeoutError, aiohttp.ClientError, OSError))
+
+
+class CircuitBreaker:
+    """
+    Tracks the failures and latencies of one upstream (or one of its indexers).
+    Opens after too many failures so calls are skipped instead of waiting out
+    the timeout, then lets a single trial call through once the cooldown is over.
+    Timeouts of healthy upstreams are shortened to a multiple of their p95 latency.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"
+        self.opened_at = 0
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=WINDOW_SIZE)
+        self.latencies = deque(maxlen=WINDOW_SIZE)
+        self.probing = False
+        self.calls = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def allow(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < settings.CIRCUIT_BREAKER_COOLDOWN:
+                return False
+            self.state = "half_open"
+
+        if self.state == "half_open":
+            if self.probing:
+                return False
+            self.probing = True
+
+        return True
+
+    def percentile(self, percent: float):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent))]
+
+    def timeout(self, default: float):
+        factor = settings.CIRCUIT_BREAKER_TIMEOUT_FACTOR
+        if not factor or len(self.latencies) < MIN_CALLS:
+            return default
+        return min(default, max(MIN_TIMEOUT, self.percentile(0.95) * factor))
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def record_success(self, latency: float):
+        self.outcomes.append(True)
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        self.failures += 1
+        self.consecutive_failures += 1
+        if (
+            self.state == "half_open"
+            or self.consecutive_failures >= settings.CIRCUIT_BREAKER_FAILURES
+            or (
+                len(self.outcomes) >= MIN_CALLS
+                and self.error_rate() >= settings.CIRCUIT_BREAKER_ERROR_RATE
+            )
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            # The upstream may just have slowed down, its old latencies no longer apply
+            self.latencies.clear()
+
+    @asynccontextmanager
+    async def guard(self, timeout: float):
+        if not self.allow():
+            self.skipped += 1
+            raise CircuitOpenError(f"Circuit open for {self.name}, skipping the call")
+
+        probe = self.state == "half_open"
+        self.calls += 1
+        start = time.monotonic()
+        try:
+            # Trial calls get the full timeout, a shortened one could keep a slower upstream out for good
+            async with asyncio.timeout(timeout if probe else self.timeout(timeout)):
+                yield
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.record_failure()
+            else:
+                self.record_success(time.monotonic() - start)
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+        finally:
+            if probe:
+                self.probing = False
+
+    def stats(self):
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "error_rate": round(self.error_rate(), 4),
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "retry_in": round(max(0, self.opened_at + settings.CIRCUIT_BREAKER_COOLDOWN - time.monotonic()), 1)
+            if self.state == "open"
+            else 0,
+        }
+
+
+def get_breaker(name: str):
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+@asynccontextmanager
+async def circuit(name: str, timeout: float):
+    """
+    Guards a call to an upstream. Raises CircuitOpenError without calling it when
+    its breaker is open, callers handle it like any other failed request.
+    """
+    if settings.CIRCUIT_BREAKER_FAILURES <= 0:
+        yield
+        return
+
+    async with get_breaker(name).guard(timeout):
+        yield
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+# Every cache registers itself here so the admin endpoint can report on it
+caches = {}
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL and hit/miss counters.
+    A ttl of 0 keeps entries until they are evicted by size.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: int = 0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+        caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at and expires_at < time.time():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None):
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (value, time.time() + ttl if ttl else 0)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None):
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: Hashable):
+        entry = self._data.get(key, _MISSING)
+        return entry is not _MISSING and not (entry[1] and entry[1] < time.time())
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into a single running task.
+    Waiters are shielded, so a cancelled request does not cancel the shared work.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key: Hashable, coroutine_factory):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+        # Retrieve the exception so it is not reported when every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self):
+        return len(self._tasks)
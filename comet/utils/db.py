@@ -35,6 +35,24 @@ async def setup_database():
         await database.execute(
             "CREATE TABLE IF NOT EXISTS download_links (debrid_key TEXT, hash TEXT, file_index TEXT, link TEXT, timestamp INTEGER, PRIMARY KEY (debrid_key, hash, file_index))"
         )
+        await database.execute(
+            "CREATE TABLE IF NOT EXISTS metadata (id TEXT PRIMARY KEY, name TEXT, year INTEGER, year_end INTEGER, timestamp INTEGER)"
+        )
+        await database.execute(
+            "CREATE TABLE IF NOT EXISTS aliases (id TEXT PRIMARY KEY, aliases TEXT, timestamp INTEGER)"
+        )
+        await database.execute(
+            "CREATE TABLE IF NOT EXISTS imdb_search (query TEXT PRIMARY KEY, data TEXT, timestamp INTEGER)"
+        )
+        await database.execute(
+            "CREATE TABLE IF NOT EXISTS scrapes (source TEXT, query TEXT, results TEXT, timestamp INTEGER, PRIMARY KEY (source, query))"
+        )
+        await database.execute(
+            "CREATE TABLE IF NOT EXISTS availability (debridService TEXT, info_hash TEXT, season INTEGER, episode INTEGER, file TEXT, timestamp INTEGER, PRIMARY KEY (debridService, info_hash, season, episode))"
+        )
+        await database.execute(
+            "CREATE TABLE IF NOT EXISTS torrent_links (link TEXT PRIMARY KEY, info_hash TEXT, timestamp INTEGER)"
+        )
         await database.execute("DROP TABLE IF EXISTS active_connections")
         await database.execute(
             "CREATE TABLE IF NOT EXISTS active_connections (id TEXT PRIMARY KEY, ip TEXT, content TEXT, timestamp INTEGER)"
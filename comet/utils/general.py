@@ -1,10 +1,14 @@
 import base64
+import functools
 import hashlib
 import os
+import random
 import re
 import zlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Literal, List, Union, Callable, Any
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
 
 import PTT
 import aiohttp
@@ -13,10 +17,12 @@ import asyncio
 import orjson
 import time
 import copy
+from types import MappingProxyType
 
 from RTN import parse, title_match
-from aiohttp import ClientSession
-from curl_cffi import requests
+from RTN.exceptions import GarbageTorrent
+from RTN.fetch import check_fetch
+from RTN.ranker import get_rank
 from databases import Database
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
@@ -24,8 +30,12 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from fastapi import Request
 
+from comet.utils.breaker import circuit
+from comet.utils.cache import LRUCache, SingleFlight
+from comet.utils.http import ScopedSession, http_client, timeout_profiles
+from comet.utils.json_stream import iter_json_array
 from comet.utils.logger import logger
-from comet.utils.models import database, settings, ConfigModel
+from comet.utils.models import database, rtn, settings, ConfigModel
 
 languages_emojis = {
     "unknown": "❓",  # Unknown
@@ -185,6 +195,15 @@ translation_table = str.maketrans(translation_table)
 info_hash_pattern = re.compile(r"\b([a-fA-F0-9]{40})\b")
 extra_file_pattern = re.compile(r"\b(sample|ncop|nced|op|ed|extras|special|omake|ova|ona|oad|pv|cm|promo|trailer|preview|teaser|creditless|behind[ _-]?the[ _-]?scenes|making[ _-]?of|deleted[ _-]?scenes)\b", re.IGNORECASE)
 debrid_services = {"debridlink", "realdebrid", "alldebrid", "torbox"}
+config_cache = LRUCache("configs", settings.CONFIG_CACHE_SIZE, settings.CONFIG_CACHE_TTL)
+short_config_cache = LRUCache("short_configs", settings.CONFIG_CACHE_SIZE, settings.CONFIG_CACHE_TTL)
+metadata_cache = LRUCache("metadata", settings.METADATA_CACHE_SIZE, settings.METADATA_CACHE_TTL)
+aliases_cache = LRUCache("aliases", settings.METADATA_CACHE_SIZE, settings.METADATA_CACHE_TTL)
+imdb_search_cache = LRUCache("imdb_search", settings.METADATA_CACHE_SIZE, settings.METADATA_CACHE_TTL)
+availability_cache = LRUCache("availability", settings.AVAILABILITY_CACHE_SIZE, settings.AVAILABILITY_CACHE_TTL)
+torrent_link_cache = LRUCache("torrent_links", settings.TORRENT_LINK_CACHE_SIZE, settings.TORRENT_LINK_CACHE_TTL)
+prowlarr_indexers = []
+prowlarr_refresh = SingleFlight()
 
 catalog_config = {
     "realdebrid": {
@@ -238,6 +257,61 @@ def translate(title: str):
     return title.translate(translation_table)
 
 
+@functools.lru_cache(maxsize=settings.PARSE_CACHE_SIZE)
+def cached_parse(raw_title: str):
+    """
+    RTN parse memoized per raw title, the same release names come back on every search.
+    The ParsedData is shared between callers and must not be modified.
+    """
+    return parse(raw_title)
+
+
+# Resolution buckets of RTN's sort_torrents, anything else goes in bucket 0
+resolution_buckets = {
+    "4k": 4,
+    "2160p": 4,
+    "1440p": 4,
+    "1080p": 3,
+    "720p": 2,
+    "576p": 1,
+    "480p": 1,
+    "360p": 1,
+}
+infohash_pattern = re.compile(r"[a-fA-F0-9]{40}")
+
+
+def rank_title(raw_title: str, infohash: str):
+    """
+    Same as rtn.rank with remove_trash=False, but the title parse comes from cached_parse
+    and the torrent is returned as the plain dict Torrent.model_dump would give.
+    """
+    if not raw_title or not infohash:
+        raise ValueError("Both the title and infohash must be provided.")
+
+    if not infohash_pattern.fullmatch(infohash):
+        raise GarbageTorrent("The infohash must be a valid SHA-1 hash and 40 characters in length.")
+
+    parsed_data = cached_parse(raw_title)
+    is_fetchable, _ = check_fetch(parsed_data, rtn.settings, True)
+    rank = get_rank(parsed_data, rtn.settings, rtn.ranking_model)
+
+    if rank < rtn.settings.options["remove_ranks_under"]:
+        raise GarbageTorrent(f"'{raw_title}' does not meet the minimum rank requirement, got rank of {rank}")
+
+    return {
+        "infohash": infohash,
+        "raw_title": raw_title,
+        "torrent": None,
+        "seeders": 0,
+        "leechers": 0,
+        "trackers": [],
+        "data": parsed_data.model_dump(),
+        "fetch": is_fetchable,
+        "rank": rank,
+        "lev_ratio": 0.0,
+    }
+
+
 def clean_titles(torrent_name):
     """
     Extracts the main title from a torrent name by removing tags, subtitles, and additional information.
@@ -255,17 +329,46 @@ VIDEO_FILE_EXTENSIONS = [
 ]
 
 
+video_file_extensions = tuple(VIDEO_FILE_EXTENSIONS)
+video_extension_pattern = re.compile(
+    r'\.(' + '|'.join(ext.lstrip('.') for ext in VIDEO_FILE_EXTENSIONS) + ')$', re.IGNORECASE
+)
+
+
 def is_video(title: str):
-    return title.endswith(
-        tuple(
-            VIDEO_FILE_EXTENSIONS
-        )
-    )
+    return title.endswith(video_file_extensions)
 
 
 def remove_file_extension(title):
-    regex_pattern = r'\.(' + '|'.join(ext.lstrip('.') for ext in VIDEO_FILE_EXTENSIONS) + ')$'
-    return re.sub(regex_pattern, '', title, flags=re.IGNORECASE)
+    return video_extension_pattern.sub('', title)
+
+
+@functools.lru_cache(maxsize=8192)
+def classify_file(file_name: str):
+    """
+    Returns (is_video, is_extra, stem) of a file name: whether it has a video
+    extension, whether it looks like a sample, opening, trailer or other extra,
+    and the name without its video extension.
+    """
+    if file_name.endswith(video_file_extensions):
+        return True, extra_file_pattern.search(file_name) is not None, file_name[:file_name.rfind('.')]
+
+    return False, extra_file_pattern.search(file_name) is not None, video_extension_pattern.sub('', file_name)
+
+
+def classify_files(file_names: list):
+    # File lists of the same season packs come back on every request, most names are cache hits
+    return [classify_file(file_name) for file_name in file_names]
+
+
+def playable_files(files: list, file_name_getter: Callable):
+    """
+    Yields (position, file, file name) of the video files of a list that are not extras.
+    """
+    file_names = [file_name_getter(file) for file in files]
+    for i, (file, file_name, (video, extra, _)) in enumerate(zip(files, file_names, classify_files(file_names))):
+        if video and not extra:
+            yield i, file, file_name
 
 
 def bytes_to_size(bytes: int):
@@ -285,6 +388,8 @@ def derive_debrid_key(debrid_key: str):
     return hashlib.sha256(debrid_key.encode()).hexdigest()
 
 
+# PBKDF2 is deliberately slow, derive once per token (a rotated token simply gets its own entry)
+@functools.lru_cache(maxsize=8)
 def derive_key(token: str, salt: bytes = b'comet_fast') -> bytes:
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
@@ -314,6 +419,32 @@ def short_decrypt(encoded_data: str, token: str) -> str:
     return zlib.decompress(decrypted).decode('utf-8')
 
 
+def get_short_config(config: dict) -> str:
+    """
+    Encrypted playback config of a user, reused for every stream of a response
+    and cached per debrid account since encryption uses a random nonce.
+    """
+    cache_key = (
+        settings.TOKEN,
+        config["debridService"],
+        derive_debrid_key(config["debridApiKey"]),
+        config["debridStreamProxyPassword"],
+    )
+    short_config = short_config_cache.get(cache_key)
+    if short_config is None:
+        short_config = short_encrypt(
+            orjson.dumps({
+                "debridApiKey": config["debridApiKey"],
+                "debridStreamProxyPassword": config["debridStreamProxyPassword"],
+                "debridService": config["debridService"]
+            }).decode("utf-8"),
+            settings.TOKEN
+        )
+        short_config_cache.set(cache_key, short_config)
+
+    return short_config
+
+
 def is_encrypted(s: str) -> bool:
     try:
         orjson.loads(base64.b64decode(s + '=' * (-len(s) % 4)).decode())
@@ -347,18 +478,43 @@ def language_to_country_code(lang_codes):
     return [lang_to_country.get(code, code.upper()) for code in lang_codes]
 
 
+# Every language PTT knows, used to extract the localized titles of a media once for all users
+alias_language_codes = set(get_language_codes(PTT.parse.LANGUAGES_TRANSLATION_TABLE.values()))
+alias_country_codes = set(language_to_country_code(alias_language_codes))
+
+
 def config_check(config_data: str):
-    try:
-        config = None
-        if settings.TOKEN and is_encrypted(config_data):
-            config = orjson.loads(short_decrypt(config_data, settings.TOKEN))
-        else:
-            config = orjson.loads(base64.b64decode(config_data + '=' * (-len(config_data) % 4)).decode())
-        validated_config = ConfigModel(**config)
-        return validated_config.model_dump()
-    except Exception as e:
-        logger.error(f"Error checking config: {e}")
-        return False
+    cache_key = (settings.TOKEN, config_data)
+    frozen_config = config_cache.get(cache_key)
+    if frozen_config is None:
+        try:
+            config = None
+            if settings.TOKEN and is_encrypted(config_data):
+                config = orjson.loads(short_decrypt(config_data, settings.TOKEN))
+            else:
+                config = orjson.loads(base64.b64decode(config_data + '=' * (-len(config_data) % 4)).decode())
+            validated_config = ConfigModel(**config)
+            frozen_config = freeze_config(validated_config.model_dump())
+        except Exception as e:
+            logger.error(f"Error checking config: {e}")
+            return False
+
+        config_cache.set(cache_key, frozen_config)
+
+    # Handlers mutate the config (default proxy account), so each request gets its own copy
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in frozen_config.items()
+    }
+
+
+def freeze_config(config: dict):
+    return MappingProxyType(
+        {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in config.items()
+        }
+    )
 
 
 def size_to_bytes(size_str: str):
@@ -419,8 +575,171 @@ def build_custom_filename(parsed_data: dict):
     return filename
 
 
+async def refresh_prowlarr_indexers(session: ScopedSession):
+    async with circuit("prowlarr", settings.INDEXER_MANAGER_TIMEOUT):
+        get_indexers = await session.get(
+            f"{settings.INDEXER_MANAGER_URL}/api/v1/indexer",
+            headers={"X-Api-Key": settings.INDEXER_MANAGER_API_KEY},
+            timeout=timeout_profiles["indexer"],
+        )
+        get_indexers = await get_indexers.json()
+
+    prowlarr_indexers[:] = [
+        {
+            "id": indexer["id"],
+            "name": indexer["name"].lower(),
+            "definitionName": indexer["definitionName"].lower(),
+            "protocol": indexer["protocol"],
+        }
+        for indexer in get_indexers
+    ]
+    return prowlarr_indexers
+
+
+async def get_prowlarr_indexers(session: ScopedSession):
+    """
+    Prowlarr indexer list, kept in memory and refreshed in the background.
+    Only fetched inline before the first search or after an error cleared it.
+    """
+    if prowlarr_indexers:
+        return prowlarr_indexers
+
+    return await prowlarr_refresh.do("indexers", lambda: refresh_prowlarr_indexers(session))
+
+
+# Only the fields used after scraping are kept in the shared scrape cache
+scrape_fields = ("Title", "InfoHash", "Size", "Tracker", "TrackerId", "Seeders", "Link", "MagnetUri", "Protocol")
+
+
+async def get_cached_scrapes(query: str, sources: list):
+    rows = await database.fetch_all(
+        f"""
+        SELECT source, results
+        FROM scrapes
+        WHERE query = :query
+        AND source IN (SELECT cast(value as TEXT) FROM {'json_array_elements_text' if settings.DATABASE_TYPE == 'postgresql' else 'json_each'}(:sources))
+        AND timestamp + :ttl >= :current_time
+        """,
+        {
+            "query": query,
+            "sources": orjson.dumps(sources).decode("utf-8"),
+            "ttl": settings.SCRAPE_CACHE_TTL,
+            "current_time": time.time(),
+        },
+    )
+
+    return {row["source"]: orjson.loads(row["results"]) for row in rows}
+
+
+async def cache_scrapes(query: str, results_by_source: dict):
+    """
+    Stores the results of each source for a query, shared by every user whatever
+    their debrid service. Empty results are not stored since failing scrapers
+    return nothing too.
+    """
+    results_by_source = {
+        source: [
+            {
+                field: result.get(field)
+                for field in scrape_fields
+                # InfoHash stays even when None, .torrent link results are resolved later
+                if field == "InfoHash" or result.get(field) is not None
+            }
+            for result in results
+        ]
+        for source, results in results_by_source.items()
+    }
+
+    current_time = time.time()
+    values = [
+        {
+            "source": source,
+            "query": query,
+            "results": orjson.dumps(results).decode("utf-8"),
+            "timestamp": current_time,
+        }
+        for source, results in results_by_source.items()
+        if results
+    ]
+    if values:
+        await database.execute_many(
+            f"INSERT {'OR REPLACE ' if settings.DATABASE_TYPE == 'sqlite' else ''}INTO scrapes (source, query, results, timestamp) VALUES (:source, :query, :results, :timestamp){' ON CONFLICT (source, query) DO UPDATE SET results = EXCLUDED.results, timestamp = EXCLUDED.timestamp' if settings.DATABASE_TYPE == 'postgresql' else ''}",
+            values,
+        )
+
+    return results_by_source
+
+
+async def cached_scrape(source: str, query: str, scrape: Callable):
+    cached = await get_cached_scrapes(query, [source])
+    if source in cached:
+        return cached[source]
+
+    results = await scrape()
+    return (await cache_scrapes(query, {source: results}))[source]
+
+
+def normalize_prowlarr_result(result: dict):
+    info_hash = result.get("infoHash")
+    if result["protocol"] == "usenet" and info_hash is None:
+        info_hash = hashlib.sha1(result["fileName"].encode('utf-8')).hexdigest()
+
+    return {
+        "Title": result["title"],
+        "InfoHash": info_hash,
+        "Size": result["size"],
+        "Link": result.get("downloadUrl"),
+        "Tracker": result["indexer"],
+        "Protocol": result["protocol"],
+    }
+
+
+# Share of INDEXER_MANAGER_TIMEOUT given to the batched Jackett search, the
+# per-indexer retries of the trackers it missed run in what is left
+JACKETT_BATCH_TIMEOUT_SHARE = 0.5
+
+
+async def fetch_jackett_batch(session: ScopedSession, sources: dict, query: str, timeout: float):
+    """
+    Searches every tracker in a single Jackett request. `sources` maps the Jackett
+    tracker ids to their source names. Returns the results per source and the
+    sources whose tracker failed, timed out or is missing from the response,
+    so only those are queried again one by one.
+    """
+    try:
+        trackers = "&".join(f"Tracker[]={indexer}" for indexer in sources)
+        async with circuit("jackett", timeout):
+            async with session.get(
+                    f"{settings.INDEXER_MANAGER_URL}/api/v2.0/indexers/all/results?apikey={settings.INDEXER_MANAGER_API_KEY}&Query={query}&{trackers}",
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                response_json = await response.json()
+    except Exception as e:
+        logger.warning(
+            f"Exception while fetching batched Jackett results for {query}, falling back to per-indexer requests: {e}"
+        )
+        return {}, set(sources.values())
+
+    trackers = {indexer.lower(): source for indexer, source in sources.items()}
+    results_by_source = {}
+    for indexer in response_json.get("Indexers", []):
+        source = trackers.get(str(indexer.get("ID", "")).lower()) or trackers.get(str(indexer.get("Name", "")).lower())
+        # Jackett reports 2 for trackers which answered without error
+        if source and indexer.get("Status") == 2:
+            results_by_source[source] = []
+
+    for result in response_json.get("Results", []):
+        source = trackers.get(str(result.get("TrackerId", "")).lower()) or trackers.get(str(result.get("Tracker", "")).lower())
+        if source is None:
+            source = str(result.get("Tracker", "")).lower().replace(" ", "_")
+        results_by_source.setdefault(source, []).append(result)
+
+    failed = {source for source in sources.values() if source not in results_by_source}
+    return results_by_source, failed
+
+
 async def get_indexer_manager(
-        session: aiohttp.ClientSession,
+        session: ScopedSession,
         indexer_manager_type: str,
         indexers: list,
         query: str,
@@ -428,106 +747,149 @@ async def get_indexer_manager(
 ):
     results = []
     try:
-        indexers = [indexer.replace("_", " ") for indexer in indexers]
+        cached = await get_cached_scrapes(query, indexers)
+        for source_results in cached.values():
+            results.extend(
+                result for result in source_results
+                if result.get("Protocol") != "usenet" or config["debridService"] == "torbox"
+            )
+
+        sources = [indexer for indexer in indexers if indexer not in cached]
+        if not sources:
+            return results
+
+        indexers = [indexer.replace("_", " ") for indexer in sources]
+        results_by_source = {}
 
         if indexer_manager_type == "jackett":
 
             async def fetch_jackett_results(
-                    session: aiohttp.ClientSession, indexer: str, query: str
+                    session: ScopedSession, indexer: str, query: str, timeout: float
             ):
                 try:
-                    async with session.get(
-                            f"{settings.INDEXER_MANAGER_URL}/api/v2.0/indexers/all/results?apikey={settings.INDEXER_MANAGER_API_KEY}&Query={query}&Tracker[]={indexer}",
-                            timeout=aiohttp.ClientTimeout(
-                                total=settings.INDEXER_MANAGER_TIMEOUT
-                            ),
-                    ) as response:
-                        response_json = await response.json()
-                        return response_json.get("Results", [])
+                    async with circuit(f"jackett:{indexer}", timeout):
+                        async with session.get(
+                                f"{settings.INDEXER_MANAGER_URL}/api/v2.0/indexers/all/results?apikey={settings.INDEXER_MANAGER_API_KEY}&Query={query}&Tracker[]={indexer}",
+                                timeout=aiohttp.ClientTimeout(total=timeout),
+                        ) as response:
+                            response_json = await response.json()
+                            return response_json.get("Results", [])
                 except Exception as e:
                     logger.warning(
                         f"Exception while fetching Jackett results for indexer {indexer}: {e}"
                     )
                     return []
 
-            tasks = [
-                fetch_jackett_results(session, indexer, query) for indexer in indexers
-            ]
-            all_results = await asyncio.gather(*tasks)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.INDEXER_MANAGER_TIMEOUT
+            if settings.JACKETT_BATCH_TRACKERS and len(indexers) > 1:
+                # One slow tracker holds the whole batch back, so it only gets part of the timeout
+                results_by_source, failed = await fetch_jackett_batch(
+                    session, dict(zip(indexers, sources)), query,
+                    settings.INDEXER_MANAGER_TIMEOUT * JACKETT_BATCH_TIMEOUT_SHARE,
+                )
+                retry = [(indexer, source) for indexer, source in zip(indexers, sources) if source in failed]
+            else:
+                retry = list(zip(indexers, sources))
 
-            for result_set in all_results:
-                results.extend(result_set)
+            if retry:
+                remaining = deadline - loop.time()
+                tasks = [
+                    fetch_jackett_results(session, indexer, query, remaining) for indexer, _ in retry
+                ]
+                all_results = await asyncio.gather(*tasks)
+
+                results_by_source.update(
+                    (source, source_results) for (_, source), source_results in zip(retry, all_results)
+                )
 
         elif indexer_manager_type == "prowlarr":
-            get_indexers = await session.get(
-                f"{settings.INDEXER_MANAGER_URL}/api/v1/indexer",
-                headers={"X-Api-Key": settings.INDEXER_MANAGER_API_KEY},
-            )
-            get_indexers = await get_indexers.json()
+            get_indexers = await get_prowlarr_indexers(session)
 
             indexers_id = []
+            indexer_sources = {}
             for indexer in get_indexers:
                 if (
                     (indexer["protocol"] != "usenet" or config["debridService"] == "torbox")
                     and (
-                    indexer["name"].lower() in indexers
-                    or indexer["definitionName"].lower() in indexers
+                    indexer["name"] in indexers
+                    or indexer["definitionName"] in indexers
                     )
                 ):
                     indexers_id.append(indexer["id"])
-
-            response = await session.get(
-                f"{settings.INDEXER_MANAGER_URL}/api/v1/search?query={query}&indexerIds={'&indexerIds='.join(str(indexer_id) for indexer_id in indexers_id)}&type=search&limit=500000",
-                headers={"X-Api-Key": settings.INDEXER_MANAGER_API_KEY},
-            )
-            response = await response.json()
-
-            for result in response:
-                result["InfoHash"] = (
-                    result["infoHash"] if "infoHash" in result else None
-                )
-                if result["protocol"] == "usenet" and result["InfoHash"] is None:
-                    result["InfoHash"] = hashlib.sha1(result["fileName"].encode('utf-8')).hexdigest()
-                result["Title"] = result["title"]
-                result["Size"] = result["size"]
-                result["Link"] = (
-                    result["downloadUrl"] if "downloadUrl" in result else None
+                    indexer_name = indexer["name"] if indexer["name"] in indexers else indexer["definitionName"]
+                    indexer_sources[indexer["id"]] = indexer_name.replace(" ", "_")
+
+            if not indexers_id:
+                return results
+
+            results_by_source = {source: [] for source in set(indexer_sources.values())}
+            seen_hashes = set()
+            async with circuit("prowlarr", settings.INDEXER_MANAGER_TIMEOUT):
+                response = await session.get(
+                    f"{settings.INDEXER_MANAGER_URL}/api/v1/search?query={query}&indexerIds={'&indexerIds='.join(str(indexer_id) for indexer_id in indexers_id)}&type=search&limit={settings.INDEXER_MANAGER_MAX_RESULTS or 500000}",
+                    headers={"X-Api-Key": settings.INDEXER_MANAGER_API_KEY},
+                    timeout=timeout_profiles["indexer"],
                 )
-                result["Tracker"] = result["indexer"]
-                result["Protocol"] = result["protocol"]
-
-                results.append(result)
+                try:
+                    # Results are normalized as they are read, the raw body is never held whole
+                    async for result in iter_json_array(response.content, settings.INDEXER_MANAGER_MAX_RESULTS):
+                        source = indexer_sources.get(result.get("indexerId"), result["indexer"])
+                        result = normalize_prowlarr_result(result)
+                        if result["InfoHash"] is not None:
+                            if result["InfoHash"] in seen_hashes:
+                                continue
+                            seen_hashes.add(result["InfoHash"])
+
+                        results_by_source.setdefault(source, []).append(result)
+                finally:
+                    response.release()
+
+        for source_results in (await cache_scrapes(query, results_by_source)).values():
+            results.extend(source_results)
     except Exception as e:
         logger.warning(
             f"Exception while getting {indexer_manager_type} results for {query} with {indexers}: {e}"
         )
-        pass
+        if indexer_manager_type == "prowlarr":
+            # Indexers might have been renamed or removed, fetch them again on the next search
+            prowlarr_indexers.clear()
 
     return results
 
 
 async def get_zilean(
-        session: aiohttp.ClientSession, name: str, log_name: str, season: int, episode: int
+        session: ScopedSession, name: str, log_name: str, season: int, episode: int
 ):
     results = []
     try:
         show = f"&season={season}&episode={episode}"
-        get_dmm = await session.get(
-            f"{settings.ZILEAN_URL}/dmm/filtered?query={name}{show if season else ''}"
-        )
-        get_dmm = await get_dmm.json()
-
-        if isinstance(get_dmm, list):
-            take_first = get_dmm[: settings.ZILEAN_TAKE_FIRST]
-            for result in take_first:
-                object = {
-                    "Title": result["raw_title"],
-                    "InfoHash": result["info_hash"],
-                    "Size": int(result["size"]),
-                    "Tracker": "DMM",
-                }
+        seen_hashes = set()
+        async with circuit("zilean", settings.INDEXER_MANAGER_TIMEOUT):
+            get_dmm = await session.get(
+                f"{settings.ZILEAN_URL}/dmm/filtered?query={name}{show if season else ''}",
+                timeout=timeout_profiles["zilean"],
+            )
+            try:
+                # Parsing stops as soon as enough unique torrents are found
+                async for result in iter_json_array(get_dmm.content):
+                    info_hash = result["info_hash"].lower()
+                    if info_hash in seen_hashes:
+                        continue
+                    seen_hashes.add(info_hash)
 
-                results.append(object)
+                    object = {
+                        "Title": result["raw_title"],
+                        "InfoHash": result["info_hash"],
+                        "Size": int(result["size"]),
+                        "Tracker": "DMM",
+                    }
+
+                    results.append(object)
+                    if len(results) >= settings.ZILEAN_TAKE_FIRST:
+                        break
+            finally:
+                get_dmm.release()
 
         logger.info(f"{len(results)} torrents found for {log_name} using title {name} with Zilean")
     except Exception as e:
@@ -539,21 +901,133 @@ async def get_zilean(
     return results
 
 
+# Scrapers left running after the soft deadline, referenced so they are not garbage collected
+background_scrapes = set()
+
+
+def _finish_background_scrape(task: asyncio.Future):
+    background_scrapes.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.warning(f"Exception in background scrape: {task.exception()}")
+
+
+async def gather_until(tasks: list, timeout: float):
+    """
+    Like asyncio.gather, but only waits `timeout` seconds for the tasks. Results of
+    the tasks done by then are returned in order, the others keep running in the
+    background so their results still land in the scrape cache.
+    Returns the results and the number of tasks still running.
+    """
+    futures = [asyncio.ensure_future(task) for task in tasks]
+    if not futures:
+        return [], 0
+
+    _, pending = await asyncio.wait(futures, timeout=timeout)
+    for future in pending:
+        background_scrapes.add(future)
+        future.add_done_callback(_finish_background_scrape)
+
+    return [future.result() for future in futures if future not in pending], len(pending)
+
+
+async def get_zilean_results(
+        session: ScopedSession, titles: list, log_name: str, season: int, episode: int
+):
+    """
+    Zilean results of every search title, each cached per (title, season, episode),
+    merged without the torrents found under several titles and capped to
+    ZILEAN_TAKE_FIRST unique info hashes, the first titles taking precedence.
+    """
+    responses = await asyncio.gather(
+        *(
+            cached_scrape(
+                "dmm",
+                f"{title}|{season}|{episode}",
+                functools.partial(get_zilean, session, title, log_name, season, episode),
+            )
+            for title in titles
+        )
+    )
+
+    results = []
+    seen_hashes = set()
+    for response in responses:
+        for result in response:
+            if len(results) >= settings.ZILEAN_TAKE_FIRST:
+                break
+
+            info_hash = result["InfoHash"].lower()
+            if info_hash in seen_hashes:
+                continue
+            seen_hashes.add(info_hash)
+
+            results.append(result)
+
+    if len(titles) > 1:
+        logger.info(
+            f"{len(results)} unique torrents found for {log_name} with Zilean across {len(titles)} titles"
+        )
+
+    return results
+
+
+async def poll_with_backoff(
+    fetch: Callable,
+    is_ready: Callable,
+    attempts: int,
+    base_delay: float = 1,
+    max_delay: float = 8,
+    on_wait: Callable = None,
+    initial: Any = None,
+):
+    """
+    Calls `fetch` until `is_ready` accepts its result, sleeping with exponential
+    backoff and jitter in between. A None result from `fetch` aborts the polling.
+    `initial` skips the first fetch when the caller already has a fresh result.
+    Returns the last result and whether it is ready.
+    """
+    result = initial if initial is not None else await fetch()
+    for attempt in range(attempts):
+        if result is None:
+            return None, False
+        if is_ready(result):
+            return result, True
+
+        if on_wait:
+            on_wait(result, attempt)
+
+        delay = min(max_delay, base_delay * 2 ** attempt)
+        await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
+        result = await fetch()
+
+    return result, result is not None and is_ready(result)
+
+
+async def get_scraper_json(url: str):
+    session = http_client.curl_session
+    try:
+        response = await session.get(url)
+        return response.json()
+    except Exception:
+        response = await session.get(
+            url,
+            proxies={
+                "http": settings.DEBRID_PROXY_URL,
+                "https": settings.DEBRID_PROXY_URL,
+            },
+        )
+        # Error statuses are raised so the circuit breaker can tell them apart
+        response.raise_for_status()
+        return response.json()
+
+
 async def get_torrentio(log_name: str, type: str, full_id: str):
     results = []
     try:
-        try:
-            get_torrentio = requests.get(
+        async with circuit("torrentio", settings.SCRAPER_TIMEOUT * 2):
+            get_torrentio = await get_scraper_json(
                 f"https://torrentio.strem.fun/stream/{type}/{full_id}.json"
-            ).json()
-        except:
-            get_torrentio = requests.get(
-                f"https://torrentio.strem.fun/stream/{type}/{full_id}.json",
-                proxies={
-                    "http": settings.DEBRID_PROXY_URL,
-                    "https": settings.DEBRID_PROXY_URL,
-                },
-            ).json()
+            )
 
         for torrent in get_torrentio["streams"]:
             try:
@@ -589,6 +1063,22 @@ async def get_torrentio(log_name: str, type: str, full_id: str):
 
 
 import re
+completion_keywords = ("batch", "complete", "full")
+completion_separators = re.compile(r'[/\\|]|\n')
+season_range_pattern = re.compile(r's0?(\d+)-s0?(\d+)')
+episode_mention_pattern = re.compile(r'(?:e\d+|episode\s*\d+)')
+episode_indicators_pattern = re.compile(r's\d+e\d+|- \d+|episode \d+|e\d+')
+
+
+@functools.lru_cache(maxsize=128)
+def season_patterns(season: int):
+    # A "complete season" mention is always a season mention, so it is only tried after one
+    return (
+        re.compile(rf'(?:season\s*{season}|s0?{season})'),
+        re.compile(rf'(?:season\s*{season}|s0?{season})\s*(?:\[|\(|$)'),
+    )
+
+
 def check_completion(raw_title: str, season: str | int) -> bool:
     """
     Determines if a torrent title represents a complete season.
@@ -610,53 +1100,35 @@ def check_completion(raw_title: str, season: str | int) -> bool:
     raw_title_lower = raw_title.lower()
 
     # Check for explicit mentions of batch or complete/full season
-    if any(keyword in raw_title_lower for keyword in ['(batch)', 'batch', 'complete', 'full']):
+    if any(keyword in raw_title_lower for keyword in completion_keywords):
         return True
 
-    # Split the title into parts for further processing
-    title_parts = re.split(r'[/\\|]|\n', raw_title_lower)
+    season_mention, complete_season = season_patterns(season_int)
 
-    for part in title_parts:
+    # Split the title into parts for further processing
+    for part in completion_separators.split(raw_title_lower):
         # Handle ranges like S01-S03
-        if re.search(rf's0?(\d+)-s0?(\d+)', part):
-            start, end = map(int, re.search(rf's0?(\d+)-s0?(\d+)', part).groups())
-            if start <= season_int <= end:
-                return True
-
-        # Check for "complete season" patterns
-        complete_patterns = [
-            rf'(?:season\s*{season_int}|s0?{season_int})\s*(?:\[|\(|$)',
-            rf's0?{season_int}\s*(?:complete|full)',
-            rf'(?:complete|full)\s*(?:season\s*{season_int}|s0?{season_int})'
-        ]
-        if any(re.search(p, part) for p in complete_patterns):
+        season_range = season_range_pattern.search(part)
+        if season_range and int(season_range.group(1)) <= season_int <= int(season_range.group(2)):
             return True
 
-        # Look for season mentions without episode indicators
-        if re.search(rf'(?:season\s*{season_int}|s0?{season_int})', part) and not re.search(r'(?:e\d+|episode\s*\d+)',
-                                                                                            part):
+        # Complete season patterns, or season mentions without episode indicators
+        if season_mention.search(part) and (
+            complete_season.search(part) or not episode_mention_pattern.search(part)
+        ):
             return True
 
     # If no match, check for individual episode indicators to rule out complete season
-    episode_indicators = [r's\d+e\d+', r'- \d+', r'episode \d+', r'e\d+']
-    return not any(re.search(p, part) for part in title_parts for p in episode_indicators)
+    return not episode_indicators_pattern.search(raw_title_lower)
 
 
 async def get_mediafusion(log_name: str, type: str, full_id: str):
     results = []
     try:
-        try:
-            get_mediafusion = requests.get(
+        async with circuit("mediafusion", settings.SCRAPER_TIMEOUT * 2):
+            get_mediafusion = await get_scraper_json(
                 f"{settings.MEDIAFUSION_URL}/stream/{type}/{full_id}.json"
-            ).json()
-        except:
-            get_mediafusion = requests.get(
-                f"{settings.MEDIAFUSION_URL}/stream/{type}/{full_id}.json",
-                proxies={
-                    "http": settings.DEBRID_PROXY_URL,
-                    "https": settings.DEBRID_PROXY_URL,
-                },
-            ).json()
+            )
 
         for torrent in get_mediafusion["streams"]:
             title_full = torrent["description"]
@@ -685,7 +1157,80 @@ async def get_mediafusion(log_name: str, type: str, full_id: str):
     return results
 
 
-async def filter(
+filter_executor = None
+# Default filter pool size limit, each process worker is a full interpreter
+MAX_DEFAULT_FILTER_WORKERS = 4
+
+
+@functools.lru_cache(maxsize=None)
+def filter_workers():
+    """
+    FILTER_WORKERS when set, otherwise the usable cores up to MAX_DEFAULT_FILTER_WORKERS.
+    os.cpu_count() is the host's core count inside containers, so the CPU affinity
+    and the cgroup v2 quota are used instead when available.
+    """
+    if settings.FILTER_WORKERS:
+        return settings.FILTER_WORKERS
+
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return min(cores, MAX_DEFAULT_FILTER_WORKERS)
+
+
+def get_filter_executor():
+    """
+    Pool running the title match check and ranking of large searches when
+    FILTER_EXECUTOR is "process" or "thread", sized by filter_workers.
+    Processes are spawned, forking a server with running threads is not safe.
+    """
+    global filter_executor
+    if filter_executor is None and settings.FILTER_EXECUTOR in ("process", "thread"):
+        workers = filter_workers()
+        if settings.FILTER_EXECUTOR == "process":
+            filter_executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            filter_executor = ThreadPoolExecutor(workers, thread_name_prefix="filter")
+    return filter_executor
+
+
+async def warm_filter_executor():
+    # Spawned workers import RTN first, better done before the first large search
+    executor = get_filter_executor()
+    if isinstance(executor, ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, filter_chunk, [], [], None, None, None, {}, False) for _ in range(filter_workers()))
+        )
+
+
+def shutdown_filter_executor():
+    global filter_executor
+    if filter_executor is not None:
+        filter_executor.shutdown(wait=False, cancel_futures=True)
+        filter_executor = None
+
+
+def split_chunks(items: list, executor):
+    # Two chunks per worker keeps them all busy when one chunk is slower
+    if executor is None:
+        chunk_size = 50
+    else:
+        chunk_size = max(50, -(-len(items) // (filter_workers() * 2)))
+
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+async def filter_titles(
     torrents: list,
     title_list: list,
     season: int,
@@ -694,6 +1239,46 @@ async def filter(
     aliases: dict,
     remove_adult_content: bool,
 ):
+    """
+    Runs the title match check over (index, title) pairs and returns the indices
+    that passed. Searches of at least FILTER_OFFLOAD_MIN titles are split over the
+    filter pool so the event loop stays free, smaller ones run inline in chunks.
+    """
+    executor = get_filter_executor() if len(torrents) >= settings.FILTER_OFFLOAD_MIN else None
+    chunks = split_chunks(torrents, executor)
+    if executor is None:
+        filtered = []
+        for chunk in chunks:
+            filtered.append(filter_chunk(chunk, title_list, season, year, year_end, aliases, remove_adult_content))
+            # Lets other requests run between chunks
+            await asyncio.sleep(0)
+    else:
+        loop = asyncio.get_running_loop()
+        filtered = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, filter_chunk, chunk, title_list, season, year, year_end, aliases, remove_adult_content
+                )
+                for chunk in chunks
+            )
+        )
+
+    return {index for kept in filtered for index in kept}
+
+
+def filter_chunk(
+    torrents: list,
+    title_list: list,
+    season: int,
+    year: int,
+    year_end: int,
+    aliases: dict,
+    remove_adult_content: bool,
+):
+    """
+    Returns the indices of the (index, title) pairs matching one of the searched
+    titles, as a tuple so results sent back from the pool stay small.
+    """
     results = []
     for torrent in torrents:
         index = torrent[0]
@@ -709,36 +1294,83 @@ async def filter(
         if not title:
             continue
 
-        parsed = parse(title)
+        parsed = cached_parse(title)
+        parsed_title = parsed.parsed_title
         for name in title_list:
             if remove_adult_content and parsed.adult:
-                results.append((index, False))
                 continue
 
             if name in parsed.raw_title and check_completion(parsed.raw_title, season):
-                results.append((index, True))
+                results.append(index)
                 continue
 
-            parsed.parsed_title = clean_titles(parsed.parsed_title)
-            if parsed.parsed_title and not title_match(
-                    name, parsed.parsed_title, aliases=aliases
+            parsed_title = clean_titles(parsed_title)
+            if parsed_title and not title_match(
+                    name, parsed_title, aliases=aliases
             ):
-                results.append((index, False))
                 continue
 
             if year and parsed.year:
                 if year_end is not None:
                     if not (year <= parsed.year <= year_end):
-                        results.append((index, False))
                         continue
                 else:
                     if year < (parsed.year - 1) or year > (parsed.year + 1):
-                        results.append((index, False))
                         continue
 
-            results.append((index, True))
+            results.append(index)
 
-    return results
+    return tuple(dict.fromkeys(results))
+
+
+async def rank_titles(candidates: list):
+    """
+    Ranks (infohash, raw title) pairs and returns the ranked torrents as plain dicts
+    keyed by infohash, sorted like RTN's sort_torrents (resolution bucket, then rank).
+    At least RANK_OFFLOAD_MIN candidates are ranked in the filter pool, where the
+    workers keep the parses of their own title match checks.
+    """
+    executor = get_filter_executor() if len(candidates) >= settings.RANK_OFFLOAD_MIN else None
+    chunks = split_chunks(candidates, executor)
+    if executor is None:
+        results = []
+        for chunk in chunks:
+            results.append(rank_chunk(chunk))
+            await asyncio.sleep(0)
+    else:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(executor, rank_chunk, chunk) for chunk in chunks)
+        )
+
+    ranked_files = []
+    for ranked, errors in results:
+        ranked_files.extend(ranked)
+        for error in errors:
+            logger.error(error)
+
+    ranked_files.sort(
+        key=lambda torrent: (resolution_buckets.get(torrent["data"]["resolution"], 0), torrent["rank"]),
+        reverse=True,
+    )
+    return {torrent["infohash"]: torrent for torrent in ranked_files}
+
+
+def rank_chunk(candidates: list):
+    """
+    Ranks one chunk of (infohash, raw title) pairs, returns the ranked torrents and
+    the messages of the rejected ones so they are logged by the server process.
+    """
+    ranked = []
+    errors = []
+    for infohash, raw_title in candidates:
+        try:
+            # remove_trash is off, user can choose if he wants to remove it
+            ranked.append(rank_title(raw_title, infohash))
+        except Exception as e:
+            errors.append(str(e))
+
+    return ranked, errors
 
 
 async def uncached_select_index(
@@ -820,11 +1452,8 @@ async def uncached_select_index(
     # Match based on parsed episode or year/res for movies
     torrent_parsed_data = orjson.loads(torrent_parsed_data)
 
-    for i, file in enumerate(files):
-        file_name = file_name_extractor(file)
-        if extra_file_pattern.search(file_name) or not is_video(file_name):
-            continue
-        file_name_parsed = parse(file_name)
+    for i, file, file_name in playable_files(files, file_name_extractor):
+        file_name_parsed = cached_parse(file_name)
 
         if episode:
             if len(file_name_parsed.episodes) > 0 and file_name_parsed.episodes[0] == int(episode):
@@ -1014,7 +1643,63 @@ async def cache_wipe():
         {"expiration_timestamp": expiration_timestamp}
     )
 
-    logger.warning(f"Cache cleanup completed. Total entries deleted: {result_cache}")
+    result_metadata = await database.execute(
+        """
+        DELETE FROM metadata
+        WHERE timestamp < :expiration_timestamp
+        """,
+        {"expiration_timestamp": int(time.time()) - settings.METADATA_CACHE_TTL}
+    )
+
+    result_aliases = await database.execute(
+        """
+        DELETE FROM aliases
+        WHERE timestamp < :expiration_timestamp
+        """,
+        {"expiration_timestamp": int(time.time()) - settings.METADATA_CACHE_TTL}
+    )
+
+    result_imdb_search = await database.execute(
+        """
+        DELETE FROM imdb_search
+        WHERE timestamp < :expiration_timestamp
+        OR (data IS NULL AND timestamp < :negative_expiration_timestamp)
+        """,
+        {
+            "expiration_timestamp": int(time.time()) - settings.METADATA_CACHE_TTL,
+            "negative_expiration_timestamp": int(time.time()) - settings.IMDB_SEARCH_NEGATIVE_TTL,
+        }
+    )
+
+    result_scrapes = await database.execute(
+        """
+        DELETE FROM scrapes
+        WHERE timestamp < :expiration_timestamp
+        """,
+        {"expiration_timestamp": int(time.time()) - settings.SCRAPE_CACHE_TTL}
+    )
+
+    result_availability = await database.execute(
+        """
+        DELETE FROM availability
+        WHERE timestamp < :expiration_timestamp
+        """,
+        {"expiration_timestamp": int(time.time()) - settings.AVAILABILITY_CACHE_TTL}
+    )
+
+    result_torrent_links = await database.execute(
+        """
+        DELETE FROM torrent_links
+        WHERE timestamp < :expiration_timestamp
+        OR (info_hash IS NULL AND timestamp < :negative_expiration_timestamp)
+        """,
+        {
+            "expiration_timestamp": int(time.time()) - settings.TORRENT_LINK_CACHE_TTL,
+            "negative_expiration_timestamp": int(time.time()) - settings.TORRENT_LINK_NEGATIVE_TTL,
+        }
+    )
+
+    logger.warning(f"Cache cleanup completed. Total entries deleted: {result_cache} - Metadata entries deleted: {result_metadata} - Aliases entries deleted: {result_aliases} - IMDb search entries deleted: {result_imdb_search} - Scrape entries deleted: {result_scrapes} - Availability entries deleted: {result_availability} - Torrent link entries deleted: {result_torrent_links}")
 
 
 async def add_uncached_files(
@@ -1043,7 +1728,7 @@ async def add_uncached_files(
             if info_hash not in files:
                 filename_parsed = {}
                 if episode:
-                    filename_parsed = parse(torrent["Title"])
+                    filename_parsed = cached_parse(torrent["Title"])
                     if kitsu:
                         if episode not in filename_parsed.episodes or filename_parsed.seasons:
                             continue
@@ -1074,7 +1759,189 @@ async def add_uncached_files(
     )
 
 
-async def get_torrent_hash(session: aiohttp.ClientSession, torrent: tuple):
+async def get_debrid_availability(debrid_service: str, get_availability: Callable, torrent_hashes: list):
+    """
+    Hash level availability of a debrid service: {info_hash: {"cached": bool, "files": [...]}}.
+    Only hashes that are unknown or stale are sent to the provider, `get_availability`
+    leaves out the hashes it could not check so failures are never cached.
+    """
+    availability = {}
+    missing = []
+    for hash in torrent_hashes:
+        hash = hash.lower()
+        hash_availability = availability_cache.get((debrid_service, hash))
+        if hash_availability is None:
+            missing.append(hash)
+        else:
+            availability[hash] = hash_availability
+
+    if missing:
+        fetched = await get_availability(missing)
+        for hash, hash_availability in fetched.items():
+            availability_cache.set((debrid_service, hash), hash_availability)
+            availability[hash] = hash_availability
+
+    return availability
+
+
+def select_debrid_files(availability: dict, type: str, season: int, episode: int, kitsu: bool):
+    """
+    Picks the first playable file of every cached torrent matching the requested episode.
+    Files are {"index", "name", "size"} dicts in the order the provider lists them.
+    """
+    files = {}
+    for hash, hash_availability in availability.items():
+        if not hash_availability["cached"]:
+            continue
+
+        for _, file, filename in playable_files(hash_availability["files"], lambda file: file["name"]):
+            if type == "series":
+                filename_parsed = cached_parse(filename)
+                if episode not in filename_parsed.episodes:
+                    continue
+
+                if kitsu:
+                    if filename_parsed.seasons:
+                        continue
+                else:
+                    if season not in filename_parsed.seasons:
+                        continue
+
+            files[hash] = {
+                "index": file["index"],
+                "title": filename,
+                "size": file["size"],
+                "uncached": False,
+            }
+            if type == "series":
+                files[hash]["complete"] = None
+
+            break
+
+    return files
+
+
+async def get_cached_availability(
+    debrid, debrid_service: str, torrent_hashes: list, type: str, season: int, episode: int, kitsu: bool
+):
+    """
+    Debrid availability of the selected files, cached per service and info hash
+    for AVAILABILITY_CACHE_TTL. Only hashes without a fresh entry hit the debrid API.
+    """
+    # Movies have no season/episode, -1 keeps them usable in the primary key
+    season_key = season if season is not None else -1
+    episode_key = episode if episode is not None else -1
+
+    rows = await database.fetch_all(
+        f"""
+        SELECT info_hash, file
+        FROM availability
+        WHERE debridService = :debrid_service
+        AND season = :season
+        AND episode = :episode
+        AND info_hash IN (SELECT cast(value as TEXT) FROM {'json_array_elements_text' if settings.DATABASE_TYPE == 'postgresql' else 'json_each'}(:hashes))
+        AND timestamp + :ttl >= :current_time
+        """,
+        {
+            "debrid_service": debrid_service,
+            "season": season_key,
+            "episode": episode_key,
+            "hashes": orjson.dumps(torrent_hashes).decode("utf-8"),
+            "ttl": settings.AVAILABILITY_CACHE_TTL,
+            "current_time": time.time(),
+        },
+    )
+
+    files = {}
+    checked = set()
+    for row in rows:
+        checked.add(row["info_hash"])
+        if row["file"]:
+            files[row["info_hash"]] = orjson.loads(row["file"])
+
+    missing = [hash for hash in torrent_hashes if hash not in checked]
+    if not missing:
+        return files
+
+    # get_files also returns the hashes the provider actually checked, failed checks are left out
+    found, checked = await debrid.get_files(missing, type, season, episode, kitsu)
+    files.update(found)
+
+    current_time = time.time()
+    values = [
+        {
+            "debridService": debrid_service,
+            "info_hash": hash,
+            "season": season_key,
+            "episode": episode_key,
+            "file": orjson.dumps(found[hash]).decode("utf-8") if hash in found else None,
+            "timestamp": current_time,
+        }
+        for hash in missing
+        if hash in found or hash.lower() in checked
+    ]
+    if values:
+        await database.execute_many(
+            f"INSERT {'OR REPLACE ' if settings.DATABASE_TYPE == 'sqlite' else ''}INTO availability (debridService, info_hash, season, episode, file, timestamp) VALUES (:debridService, :info_hash, :season, :episode, :file, :timestamp){' ON CONFLICT (debridService, info_hash, season, episode) DO UPDATE SET file = EXCLUDED.file, timestamp = EXCLUDED.timestamp' if settings.DATABASE_TYPE == 'postgresql' else ''}",
+            values,
+        )
+
+    return files
+
+
+# Torrent files above this size are decoded and hashed in a worker thread
+TORRENT_HASH_THREAD_SIZE = 64 * 1024
+
+
+def info_hash_from_torrent(torrent_data: bytes):
+    torrent_dict = bencodepy.decode(torrent_data)
+    info = bencodepy.encode(torrent_dict[b"info"])
+    return hashlib.sha1(info).hexdigest()
+
+
+def cache_torrent_link(link: str, info_hash, timestamp: float):
+    # Dead links are remembered for a shorter time
+    ttl = settings.TORRENT_LINK_CACHE_TTL if info_hash else settings.TORRENT_LINK_NEGATIVE_TTL
+    remaining = timestamp + ttl - time.time()
+    if remaining > 0:
+        torrent_link_cache.set(link, info_hash or False, remaining)
+
+
+async def prefetch_torrent_links(links: list):
+    """
+    Loads the stored info hashes of many torrent links in a single query,
+    so links resolved by a previous search are not downloaded again.
+    """
+    missing = [link for link in set(links) if link and link not in torrent_link_cache]
+    if not missing:
+        return
+
+    rows = await database.fetch_all(
+        f"""
+        SELECT link, info_hash, timestamp
+        FROM torrent_links
+        WHERE link IN (SELECT cast(value as TEXT) FROM {'json_array_elements_text' if settings.DATABASE_TYPE == 'postgresql' else 'json_each'}(:links))
+        """,
+        {"links": orjson.dumps(missing).decode("utf-8")},
+    )
+    for row in rows:
+        cache_torrent_link(row["link"], row["info_hash"], row["timestamp"])
+
+
+async def store_torrent_link(link: str, info_hash):
+    current_time = time.time()
+    cache_torrent_link(link, info_hash, current_time)
+    await database.execute(
+        f"INSERT {'OR REPLACE ' if settings.DATABASE_TYPE == 'sqlite' else ''}INTO torrent_links (link, info_hash, timestamp) VALUES (:link, :info_hash, :timestamp){' ON CONFLICT (link) DO UPDATE SET info_hash = EXCLUDED.info_hash, timestamp = EXCLUDED.timestamp' if settings.DATABASE_TYPE == 'postgresql' else ''}",
+        {"link": link, "info_hash": info_hash, "timestamp": current_time},
+    )
+
+
+def is_dead_link_status(status: int):
+    return 400 <= status < 500 and status not in (408, 429)
+
+
+async def get_torrent_hash(session: ScopedSession, torrent: tuple):
     index = torrent[0]
     torrent = torrent[1]
     if "InfoHash" in torrent and torrent["InfoHash"] is not None:
@@ -1082,34 +1949,103 @@ async def get_torrent_hash(session: aiohttp.ClientSession, torrent: tuple):
 
     url = torrent["Link"]
 
+    cached_hash = torrent_link_cache.get(url)
+    if cached_hash is not None:
+        return (index, cached_hash or None)
+
     try:
-        timeout = aiohttp.ClientTimeout(total=settings.GET_TORRENT_TIMEOUT)
-        response = await session.get(url, allow_redirects=False, timeout=timeout)
+        response = await session.get(url, allow_redirects=False, timeout=timeout_profiles["torrent"])
         if response.status == 200:
             torrent_data = await response.read()
-            torrent_dict = bencodepy.decode(torrent_data)
-            info = bencodepy.encode(torrent_dict[b"info"])
-            hash = hashlib.sha1(info).hexdigest()
+            if len(torrent_data) > TORRENT_HASH_THREAD_SIZE:
+                hash = await asyncio.to_thread(info_hash_from_torrent, torrent_data)
+            else:
+                hash = info_hash_from_torrent(torrent_data)
         else:
             location = response.headers.get("Location", "")
-            if not location:
-                return (index, None)
-
-            match = info_hash_pattern.search(location)
+            match = info_hash_pattern.search(location) if location else None
             if not match:
+                await store_torrent_link(url, None)
                 return (index, None)
 
             hash = match.group(1).upper()
 
+        await store_torrent_link(url, hash.lower())
         return (index, hash.lower())
     except Exception as e:
         logger.warning(
             f"Exception while getting torrent info hash for {torrent['indexer'] if 'indexer' in torrent else (torrent['Tracker'] if 'Tracker' in torrent else '')}|{url}: {e}"
         )
 
+        # Timeouts, connection errors, rate limits and server errors might be temporary,
+        # only links refused for good or with a broken body are remembered as dead
+        if isinstance(e, bencodepy.DecodingError) or (
+            isinstance(e, aiohttp.ClientResponseError) and is_dead_link_status(e.status)
+        ):
+            await store_torrent_link(url, None)
+
         return (index, None)
 
 
+# .torrent downloads are limited per tracker, shared by every request of the process
+torrent_fetch_limits = {}
+resolution_priority = {"2160p": 0, "4k": 0, "1080p": 1, "720p": 2, "480p": 3}
+resolution_priority_pattern = re.compile(r"\b(2160p|4k|1080p|720p|480p)\b", re.IGNORECASE)
+
+
+def torrent_priority(torrent: dict):
+    # Cheap stand-in for the final ranking: higher resolutions first, then the most seeded
+    match = resolution_priority_pattern.search(torrent["Title"])
+    resolution = resolution_priority[match.group(1).lower()] if match else len(resolution_priority)
+    return (resolution, -(torrent.get("Seeders") or 0))
+
+
+# Most hashes are dropped by the debrid availability check and the balancing,
+# so downloads stop only once this many times maxResults links were resolved
+TORRENT_FETCH_RESULTS_FACTOR = 5
+
+
+async def resolve_torrent_hashes(session: ScopedSession, torrents: list, max_results: int):
+    """
+    Resolves the info hash of every torrent like get_torrent_hash, but downloads
+    at most TORRENT_FETCH_PER_HOST .torrent files at once per tracker, the
+    most promising titles first. Once TORRENT_FETCH_RESULTS_FACTOR times `max_results`
+    links were resolved by this call the remaining downloads are skipped.
+    Returns the (index, hash) pairs and how many downloads were skipped.
+    """
+    max_fetched = max_results * TORRENT_FETCH_RESULTS_FACTOR
+    state = {"resolved": 0, "skipped": 0}
+
+    async def resolve(index: int, torrent: dict):
+        link = torrent.get("Link")
+        if torrent.get("InfoHash") is not None or not link or link in torrent_link_cache:
+            return await get_torrent_hash(session, (index, torrent))
+
+        # Jackett and Prowlarr links all point at the indexer manager, the tracker is what gets rate limited
+        tracker = str(torrent.get("TrackerId") or torrent.get("Tracker") or urlparse(link).netloc).lower()
+        limit = torrent_fetch_limits.get(tracker)
+        if limit is None:
+            limit = torrent_fetch_limits[tracker] = asyncio.Semaphore(settings.TORRENT_FETCH_PER_HOST)
+
+        async with limit:
+            if max_fetched and state["resolved"] >= max_fetched:
+                state["skipped"] += 1
+                return (index, None)
+
+            result = await get_torrent_hash(session, (index, torrent))
+
+        if result[1]:
+            state["resolved"] += 1
+        return result
+
+    # Tasks queue on the tracker limits in the order they start, so the best titles go first
+    order = sorted(range(len(torrents)), key=lambda i: torrent_priority(torrents[i]))
+    tasks = [asyncio.ensure_future(resolve(i, torrents[i])) for i in order]
+    torrent_hashes = sorted(await asyncio.gather(*tasks), key=lambda result: result[0])
+
+    return torrent_hashes, state["skipped"]
+
+
 def get_balanced_hashes(hashes: dict, config: dict, type: str):
     max_results = config["maxResults"]
     max_results_per_resolution = config["maxResultsPerResolution"]
@@ -1350,7 +2286,138 @@ def format_metadata(data: dict):
     return "|".join(extras)
 
 
-async def search_imdb_id(search_query: str, session: ClientSession):
+async def get_metadata(id: str, session: ScopedSession):
+    """
+    Name, year and year_end of an IMDb id or a "kitsu:<id>" key.
+    Served from memory, then from the metadata table, and only then fetched.
+    """
+    metadata = metadata_cache.get(id)
+    if metadata is not None:
+        return metadata
+
+    row = await database.fetch_one(
+        "SELECT name, year, year_end FROM metadata WHERE id = :id AND timestamp + :ttl >= :current_time",
+        {"id": id, "ttl": settings.METADATA_CACHE_TTL, "current_time": time.time()},
+    )
+    if row:
+        metadata = {"name": row["name"], "year": row["year"], "year_end": row["year_end"]}
+        metadata_cache.set(id, metadata)
+        return metadata
+
+    year = None
+    year_end = None
+    if id.startswith("kitsu:"):
+        async with circuit("kitsu", settings.METADATA_TIMEOUT):
+            get_metadata = await session.get(
+                f"https://kitsu.io/api/edge/anime/{id.split(':', 1)[1]}",
+                timeout=timeout_profiles["metadata"],
+            )
+            data = await get_metadata.json()
+        name = data["data"]["attributes"]["canonicalTitle"]
+    else:
+        async with circuit("imdb:suggestion", settings.METADATA_TIMEOUT):
+            get_metadata = await session.get(
+                f"https://v3.sg.media-imdb.com/suggestion/a/{id}.json",
+                timeout=timeout_profiles["metadata"],
+            )
+            data = await get_metadata.json()
+        element = data["d"][
+            0
+            if data["d"][0]["id"]
+            not in ["/imdbpicks/summer-watch-guide", "/emmys"]
+            else 1
+        ]
+
+        for element in data["d"]:
+            if "/" not in element["id"]:
+                break
+
+        name = element["l"]
+        year = element.get("y")
+        if "yr" in element:
+            year_end = int(element["yr"].split("-")[1])
+
+    metadata = {"name": name, "year": year, "year_end": year_end}
+    metadata_cache.set(id, metadata)
+    await database.execute(
+        f"INSERT {'OR REPLACE ' if settings.DATABASE_TYPE == 'sqlite' else ''}INTO metadata (id, name, year, year_end, timestamp) VALUES (:id, :name, :year, :year_end, :timestamp){' ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name, year = EXCLUDED.year, year_end = EXCLUDED.year_end, timestamp = EXCLUDED.timestamp' if settings.DATABASE_TYPE == 'postgresql' else ''}",
+        {**metadata, "id": id, "timestamp": time.time()},
+    )
+
+    return metadata
+
+
+async def prefetch_imdb_searches(search_queries: list):
+    """
+    Loads the stored IMDb search results of many titles in a single query,
+    so a catalog of a known library does not hit IMDb or the database per title.
+    """
+    queries = {query.lower() for query in search_queries}
+    missing = [query for query in queries if query not in imdb_search_cache]
+    if not missing:
+        return
+
+    rows = await database.fetch_all(
+        f"""
+        SELECT query, data, timestamp
+        FROM imdb_search
+        WHERE query IN (SELECT cast(value as TEXT) FROM {'json_array_elements_text' if settings.DATABASE_TYPE == 'postgresql' else 'json_each'}(:queries))
+        AND timestamp + :ttl >= :current_time
+        """,
+        {
+            "queries": orjson.dumps(missing).decode("utf-8"),
+            "ttl": settings.METADATA_CACHE_TTL,
+            "current_time": time.time(),
+        },
+    )
+    for row in rows:
+        cache_imdb_search(row["query"], orjson.loads(row["data"]) if row["data"] else False, row["timestamp"])
+
+
+def cache_imdb_search(query: str, imdb_data, timestamp: float):
+    # Titles without any match are remembered for a shorter time
+    ttl = settings.METADATA_CACHE_TTL if imdb_data else settings.IMDB_SEARCH_NEGATIVE_TTL
+    remaining = timestamp + ttl - time.time()
+    if remaining > 0:
+        imdb_search_cache.set(query, imdb_data, remaining)
+
+
+async def search_imdb_id(search_query: str, session: ScopedSession):
+    query = search_query.lower()
+    imdb_data = imdb_search_cache.get(query)
+    if imdb_data is None:
+        row = await database.fetch_one(
+            "SELECT data, timestamp FROM imdb_search WHERE query = :query",
+            {"query": query},
+        )
+        if row:
+            cache_imdb_search(query, orjson.loads(row["data"]) if row["data"] else False, row["timestamp"])
+            imdb_data = imdb_search_cache.get(query)
+
+    if imdb_data is None:
+        imdb_data = await request_imdb_id(search_query, session)
+        if imdb_data is None:
+            return None
+
+        current_time = time.time()
+        cache_imdb_search(query, imdb_data, current_time)
+        await database.execute(
+            f"INSERT {'OR REPLACE ' if settings.DATABASE_TYPE == 'sqlite' else ''}INTO imdb_search (query, data, timestamp) VALUES (:query, :data, :timestamp){' ON CONFLICT (query) DO UPDATE SET data = EXCLUDED.data, timestamp = EXCLUDED.timestamp' if settings.DATABASE_TYPE == 'postgresql' else ''}",
+            {
+                "query": query,
+                "data": orjson.dumps(imdb_data).decode("utf-8") if imdb_data else None,
+                "timestamp": current_time,
+            },
+        )
+
+    return imdb_data or None
+
+
+async def request_imdb_id(search_query: str, session: ScopedSession):
+    """
+    Returns the IMDb record of the best match, False when IMDb has no match at all
+    and None when the search failed.
+    """
     headers = {
         "Content-Type": "application/json",
         "Accept": "application/json",
@@ -1366,13 +2433,17 @@ async def search_imdb_id(search_query: str, session: ClientSession):
         "extensions": '{"persistedQuery":{"sha256Hash":"6842af47c3f1c43431ae23d394f3aa05ab840146b146a2666d4aa0dc346dc482","version":1}}'
     }
     try:
-        gathered_results = await session.get(f'https://caching.graphql.imdb.com/', params=params, headers=headers)
-        result = await gathered_results.json()
-        if not result or result["data"]["advancedTitleSearch"]["total"] == 0:
+        async with circuit("imdb:search", settings.METADATA_TIMEOUT):
+            gathered_results = await session.get(f'https://caching.graphql.imdb.com/', params=params, headers=headers,
+                                                 timeout=timeout_profiles["metadata"])
+            result = await gathered_results.json()
+        if not result:
             logger.warning(
                 f"Exception while searching for imdb id"
             )
             return None
+        if result["data"]["advancedTitleSearch"]["total"] == 0:
+            return False
 
         main_data = result["data"]["advancedTitleSearch"]["edges"][0]["node"]["title"]
 
@@ -1408,7 +2479,20 @@ async def search_imdb_id(search_query: str, session: ClientSession):
         return None
 
 
-async def get_localized_titles(language_codes, country_codes, id: str, session: ClientSession):
+async def get_localized_titles(id: str, session: ScopedSession):
+    aliases = aliases_cache.get(id)
+    if aliases is not None:
+        return aliases
+
+    row = await database.fetch_one(
+        "SELECT aliases FROM aliases WHERE id = :id AND timestamp + :ttl >= :current_time",
+        {"id": id, "ttl": settings.METADATA_CACHE_TTL, "current_time": time.time()},
+    )
+    if row:
+        aliases = orjson.loads(row["aliases"])
+        aliases_cache.set(id, aliases)
+        return aliases
+
     headers = {
         "content-type": "application/json"
     }
@@ -1418,16 +2502,25 @@ async def get_localized_titles(language_codes, country_codes, id: str, session:
         "extensions": '{"persistedQuery":{"sha256Hash":"48d4f7bfa73230fb550147bd4704d8050080e65fe2ad576da6276cac2330e446","version":1}}'
     }
     try:
-        gathered_localized_titles = await session.get(f'https://caching.graphql.imdb.com/', params=params,
-                                                      headers=headers)
+        async with circuit("imdb:akas", settings.METADATA_TIMEOUT):
+            gathered_localized_titles = await session.get(f'https://caching.graphql.imdb.com/', params=params,
+                                                          headers=headers, timeout=timeout_profiles["metadata"])
+            localized_titles = await gathered_localized_titles.json()
     except Exception as e:
         logger.warning(
             f"Exception while getting localized titles: {e}"
         )
         return {}
-    localized_titles = await gathered_localized_titles.json()
 
-    return extract_localized_titles(localized_titles, language_codes, country_codes)
+    # Only the extracted titles are kept, the raw akas payload is large
+    aliases = extract_localized_titles(localized_titles, alias_language_codes, alias_country_codes)
+    aliases_cache.set(id, aliases)
+    await database.execute(
+        f"INSERT {'OR REPLACE ' if settings.DATABASE_TYPE == 'sqlite' else ''}INTO aliases (id, aliases, timestamp) VALUES (:id, :aliases, :timestamp){' ON CONFLICT (id) DO UPDATE SET aliases = EXCLUDED.aliases, timestamp = EXCLUDED.timestamp' if settings.DATABASE_TYPE == 'postgresql' else ''}",
+        {"id": id, "aliases": orjson.dumps(aliases).decode("utf-8"), "timestamp": time.time()},
+    )
+
+    return aliases
 
 
 def extract_localized_titles(data: dict, language_codes, country_codes):
@@ -1594,6 +2687,7 @@ def generate_unified_streams(
         debrid_emoji="⚡"
 ):
     best_entries = {}
+    short_config = get_short_config(config) if settings.TOKEN and not is_cached else b64config
 
     for resolution in balanced_hashes:
         for hash_key in balanced_hashes[resolution]:
@@ -1637,18 +2731,6 @@ def generate_unified_streams(
                 })
             else:
                 # Debrid URL case
-                if settings.TOKEN and not is_cached:
-                    short_config = short_encrypt(
-                        orjson.dumps({
-                            "debridApiKey": config["debridApiKey"],
-                            "debridStreamProxyPassword": config["debridStreamProxyPassword"],
-                            "debridService": config["debridService"]
-                        }).decode("utf-8"),
-                        settings.TOKEN
-                    )
-                else:
-                    short_config = b64config
-
                 entry["url"] = (
                     f"{request.url.scheme}://{request.url.netloc}"
                     f"{settings.URL_PREFIX or ''}/"
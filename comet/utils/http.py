@@ -0,0 +1,124 @@
+import aiohttp
+from curl_cffi.requests import AsyncSession
+
+from comet.utils.logger import logger
+from comet.utils.models import settings
+
+
+# Timeout profiles per upstream, every request without an explicit timeout uses the one of its scope
+timeout_profiles = {
+    "default": aiohttp.ClientTimeout(total=300, sock_connect=30),
+    "metadata": aiohttp.ClientTimeout(total=settings.METADATA_TIMEOUT, sock_connect=5),
+    "indexer": aiohttp.ClientTimeout(total=settings.INDEXER_MANAGER_TIMEOUT),
+    "zilean": aiohttp.ClientTimeout(total=settings.INDEXER_MANAGER_TIMEOUT, sock_connect=10),
+    "torrent": aiohttp.ClientTimeout(total=settings.GET_TORRENT_TIMEOUT),
+    "debrid": aiohttp.ClientTimeout(total=settings.DEBRID_TIMEOUT, sock_connect=10),
+}
+
+
+class ScopedSession:
+    """
+    Lightweight view on the shared pooled ClientSession.
+    Carries its own headers and default timeout which are applied per request,
+    so per-user credentials never leak into the shared session.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, headers: dict = None, timeout: aiohttp.ClientTimeout = None):
+        self._session = session
+        self.headers = headers or {}
+        self.timeout = timeout or timeout_profiles["default"]
+
+    def scoped(self, headers: dict = None, upstream: str = None):
+        return ScopedSession(
+            self._session,
+            {**self.headers, **(headers or {})},
+            timeout_profiles[upstream] if upstream else self.timeout,
+        )
+
+    def request(self, method: str, url, **kwargs):
+        if self.headers:
+            kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        kwargs.setdefault("timeout", self.timeout)
+        return self._session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    # Scoped sessions have nothing to clean up, the pool owns the connections
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+class HttpClientPool:
+    """
+    Process-wide HTTP client. Keeps connections alive between requests and caches DNS
+    so repeated calls to IMDb, debrid services and indexers skip the handshakes.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._curl_session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self._connect()
+
+    def _connect(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_MAX_CONNECTIONS,
+                limit_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, raise_for_status=True
+            )
+        return self._session
+
+    @property
+    def curl_session(self) -> AsyncSession:
+        # Scrapers like Torrentio and MediaFusion are fetched through curl_cffi
+        if self._curl_session is None:
+            self._curl_session = AsyncSession(
+                max_clients=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                timeout=settings.SCRAPER_TIMEOUT,
+            )
+        return self._curl_session
+
+    def scoped(self, upstream: str = "default", headers: dict = None):
+        return ScopedSession(self.session, headers, timeout_profiles[upstream])
+
+    async def start(self):
+        self._connect()
+        logger.log(
+            "COMET",
+            f"HTTP client pool started - Max connections: {settings.HTTP_MAX_CONNECTIONS or 'unlimited'} - Per host: {settings.HTTP_MAX_CONNECTIONS_PER_HOST} - DNS cache: {settings.HTTP_DNS_CACHE_TTL}s",
+        )
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+        if self._curl_session is not None:
+            await self._curl_session.close()
+        self._curl_session = None
+
+
+http_client = HttpClientPool()
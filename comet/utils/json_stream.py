@@ -0,0 +1,78 @@
+import orjson
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = b" \t\r\n"
+
+
+async def iter_json_array(content, max_items: int = 0):
+    """
+    Yields the objects of a JSON array one at a time while the body is still being
+    read, so only the current object and one chunk are held in memory.
+    `content` is an aiohttp StreamReader. Stops after `max_items` objects when set.
+
+    Candidate ends are the closing braces after the start of an object, the first
+    one orjson accepts is the end of that object: a brace inside a string or
+    closing a nested object always leaves the slice invalid.
+    """
+    buffer = b""
+    position = 0
+    started = False
+    count = 0
+    eof = False
+
+    while True:
+        # Skip to the next element, reading more when the buffer runs out
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                break
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            buffer = await content.read(CHUNK_SIZE)
+            position = 0
+            eof = not buffer
+
+        char = buffer[position:position + 1]
+        if not started:
+            if char != b"[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if char == b"]":
+            return
+        if char == b",":
+            position += 1
+            continue
+        if char != b"{":
+            raise ValueError("Expected a JSON object in the array")
+
+        start = position
+        search_from = start + 1
+        while True:
+            end = buffer.find(b"}", search_from)
+            if end == -1:
+                if eof:
+                    raise ValueError("Unexpected end of JSON array")
+                chunk = await content.read(CHUNK_SIZE)
+                eof = not chunk
+                # Only the unfinished element is kept from the previous chunk
+                search_from = len(buffer) - start
+                buffer = buffer[start:] + chunk
+                start = 0
+                continue
+
+            try:
+                item = orjson.loads(memoryview(buffer)[start:end + 1])
+            except orjson.JSONDecodeError:
+                search_from = end + 1
+                continue
+
+            position = end + 1
+            break
+
+        yield item
+        count += 1
+        if max_items and count >= max_items:
+            return
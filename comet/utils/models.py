@@ -24,14 +24,42 @@ class AppSettings(BaseSettings):
     CACHE_TTL: Optional[int] = 86400
     CACHE_WIPE: Optional[int] = 172800
     CACHE_WIPE_TTL: Optional[int] = 86400
+    SCRAPE_CACHE_TTL: Optional[int] = 86400
+    AVAILABILITY_CACHE_TTL: Optional[int] = 3600
+    AVAILABILITY_CACHE_SIZE: Optional[int] = 20000
+    TORRENT_LINK_CACHE_SIZE: Optional[int] = 20000
+    TORRENT_LINK_CACHE_TTL: Optional[int] = 2592000
+    TORRENT_LINK_NEGATIVE_TTL: Optional[int] = 3600
     DEBRID_PROXY_URL: Optional[str] = None
     INDEXER_MANAGER_TYPE: Optional[str] = None
     INDEXER_MANAGER_URL: Optional[str] = "http://127.0.0.1:9117"
     INDEXER_MANAGER_API_KEY: Optional[str] = None
     INDEXER_MANAGER_TIMEOUT: Optional[int] = 30
+    INDEXER_MANAGER_MAX_RESULTS: Optional[int] = 10000
     INDEXER_MANAGER_INDEXERS: List[str] = []
+    PROWLARR_INDEXERS_REFRESH: Optional[int] = 600
+    JACKETT_BATCH_TRACKERS: Optional[bool] = True
     USENET_REFRESH_ATTEMPTS: Optional[int] = 10
     GET_TORRENT_TIMEOUT: Optional[int] = 5
+    TORRENT_FETCH_PER_HOST: Optional[int] = 5
+    METADATA_TIMEOUT: Optional[int] = 10
+    DEBRID_TIMEOUT: Optional[int] = 30
+    SCRAPER_TIMEOUT: Optional[int] = 15
+    SCRAPE_SOFT_DEADLINE: Optional[float] = 0
+    CIRCUIT_BREAKER_FAILURES: Optional[int] = 5
+    CIRCUIT_BREAKER_ERROR_RATE: Optional[float] = 0.5
+    CIRCUIT_BREAKER_COOLDOWN: Optional[int] = 60
+    CIRCUIT_BREAKER_TIMEOUT_FACTOR: Optional[float] = 4
+    HTTP_MAX_CONNECTIONS: Optional[int] = 0
+    HTTP_MAX_CONNECTIONS_PER_HOST: Optional[int] = 30
+    HTTP_KEEPALIVE_TIMEOUT: Optional[int] = 60
+    HTTP_DNS_CACHE_TTL: Optional[int] = 300
+    CONFIG_CACHE_SIZE: Optional[int] = 2048
+    CONFIG_CACHE_TTL: Optional[int] = 3600
+    METADATA_CACHE_SIZE: Optional[int] = 10000
+    METADATA_CACHE_TTL: Optional[int] = 604800
+    PARSE_CACHE_SIZE: Optional[int] = 5000
+    IMDB_SEARCH_NEGATIVE_TTL: Optional[int] = 86400
     ZILEAN_URL: Optional[str] = None
     ZILEAN_TAKE_FIRST: Optional[int] = 500
     DEBRID_TAKE_FIRST: Optional[int] = 0
@@ -46,6 +74,10 @@ class AppSettings(BaseSettings):
     PROXY_DEBRID_STREAM_DEBRID_DEFAULT_SERVICE: Optional[str] = "realdebrid"
     PROXY_DEBRID_STREAM_DEBRID_DEFAULT_APIKEY: Optional[str] = None
     TITLE_MATCH_CHECK: Optional[bool] = True
+    FILTER_EXECUTOR: Optional[str] = "thread"
+    FILTER_WORKERS: Optional[int] = 0
+    FILTER_OFFLOAD_MIN: Optional[int] = 500
+    RANK_OFFLOAD_MIN: Optional[int] = 100
     URL_PREFIX: Optional[str] = ""
     TOKEN: Optional[str] = ""
     REMOVE_ADULT_CONTENT: Optional[bool] = False
@@ -0,0 +1,36 @@
+import os
+import time
+from pathlib import Path
+
+import orjson
+import pytest
+
+from comet.utils.general import check_completion
+
+# Titles and seasons with the results of the check_completion implementation
+# that compiled its patterns on every call, the rewrite must not change them
+golden_cases = orjson.loads((Path(__file__).parent / "data" / "check_completion_golden.json").read_bytes())
+
+
+def test_check_completion_matches_golden_corpus():
+    mismatches = [
+        (title, season, expected)
+        for title, season, expected in golden_cases
+        if check_completion(title, season) != expected
+    ]
+    assert not mismatches, f"{len(mismatches)} of {len(golden_cases)} cases changed, first: {mismatches[:5]}"
+
+
+@pytest.mark.skipif(not os.getenv("COMET_BENCHMARK"), reason="set COMET_BENCHMARK=1 to run the benchmarks")
+def test_check_completion_throughput():
+    rounds = 20
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for title, season, _ in golden_cases:
+            check_completion(title, season)
+    elapsed = time.perf_counter() - start
+
+    titles_per_second = rounds * len(golden_cases) / elapsed
+    print(f"check_completion: {titles_per_second:,.0f} titles/s")
+    # On this corpus the previous implementation ran at about 100k titles/s, this one at about 380k
+    assert titles_per_second > int(os.getenv("COMET_BENCHMARK_MIN_CHECK_COMPLETION", "150000"))
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import orjson
+import pytest
+
+from comet.utils import general
+from comet.utils.general import filter_chunk, filter_titles
+from comet.utils.models import settings
+
+# Searches with the indices kept by the filter() that ran on the event loop before
+# filter_chunk, recorded from that implementation
+golden_searches = orjson.loads((Path(__file__).parent / "data" / "filter_golden.json").read_bytes())
+
+
+def search_arguments(search: dict):
+    return (
+        search["titles"],
+        search["season"],
+        search["year"],
+        search["year_end"],
+        search["aliases"],
+        search["remove_adult"],
+    )
+
+
+@pytest.mark.parametrize("search", golden_searches, ids=[search["titles"][0] for search in golden_searches])
+def test_filter_chunk_keeps_the_same_indices_as_filter(search):
+    torrents = list(enumerate(search["torrents"]))
+    assert sorted(filter_chunk(torrents, *search_arguments(search))) == search["kept"]
+
+
+@pytest.mark.parametrize("executor", ["none", "thread"])
+def test_filter_titles_keeps_the_same_indices_in_every_mode(monkeypatch, executor):
+    monkeypatch.setattr(settings, "FILTER_EXECUTOR", executor)
+    monkeypatch.setattr(settings, "FILTER_OFFLOAD_MIN", 1)
+    monkeypatch.setattr(general, "filter_executor", None)
+    try:
+        for search in golden_searches:
+            torrents = list(enumerate(search["torrents"]))
+            kept = asyncio.run(filter_titles(torrents, *search_arguments(search)))
+            assert sorted(kept) == search["kept"]
+    finally:
+        general.shutdown_filter_executor()
+
+
+async def timed_filter(torrents: list, search: dict):
+    # Measures the search and the longest time the event loop could not run anything else
+    stalls = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    await general.warm_filter_executor()
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    kept = await filter_titles(torrents, *search_arguments(search))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await beat
+    return kept, elapsed, max(stalls, default=0)
+
+
+@pytest.mark.skipif(not os.getenv("COMET_BENCHMARK"), reason="set COMET_BENCHMARK=1 to run the benchmarks")
+@pytest.mark.parametrize("count", [1_000, 5_000, 20_000])
+@pytest.mark.parametrize("executor", ["none", "thread", "process"])
+def test_filter_titles_throughput(monkeypatch, executor, count):
+    monkeypatch.setattr(settings, "FILTER_EXECUTOR", executor)
+    monkeypatch.setattr(general, "filter_executor", None)
+    search = golden_searches[0]
+    # Unique titles so every mode starts with cold parse caches
+    torrents = [
+        (i, f"{search['torrents'][i % len(search['torrents'])]} {executor} {count} {i}")
+        for i in range(count)
+    ]
+
+    try:
+        kept, elapsed, stall = asyncio.run(timed_filter(torrents, search))
+    finally:
+        general.shutdown_filter_executor()
+
+    print(f"\n{executor} {count} titles: {elapsed:.2f}s, longest event loop stall {stall * 1000:.0f}ms, {len(kept)} kept")
+    assert kept
+    if executor != "none":
+        assert stall < 0.1
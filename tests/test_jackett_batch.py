@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import os
+import socket
+import time
+
+import pytest
+from aiohttp import web
+
+from comet.utils import general
+from comet.utils.http import http_client
+from comet.utils.models import settings
+
+TRACKERS = ["alpha", "bravo", "charlie", "delta", "echo"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class JackettStandIn:
+    """
+    Answers /api/v2.0/indexers/all/results like Jackett: a search waits for its
+    slowest tracker and lists the status of every tracker it asked.
+    """
+
+    def __init__(self, delays: dict):
+        self.delays = delays
+        self.requests = 0
+
+    async def results(self, request: web.Request):
+        self.requests += 1
+        trackers = request.query.getall("Tracker[]")
+        query = request.query["Query"]
+        await asyncio.sleep(max(self.delays[tracker] for tracker in trackers))
+        return web.json_response(
+            {
+                "Results": [
+                    {
+                        "Title": f"{query} 1080p {tracker}",
+                        "InfoHash": hashlib.sha1(f"{query} {tracker}".encode()).hexdigest(),
+                        "Size": 1,
+                        "Tracker": tracker.title(),
+                        "TrackerId": tracker,
+                        "Seeders": 10,
+                    }
+                    for tracker in trackers
+                ],
+                "Indexers": [{"ID": tracker, "Name": tracker.title(), "Status": 2} for tracker in trackers],
+            }
+        )
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/v2.0/indexers/all/results", self.results)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        port = free_port()
+        await web.TCPSite(self.runner, "127.0.0.1", port).start()
+        return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def jackett_settings(monkeypatch):
+    # Scrapes are neither read from nor written to the database
+    async def get_cached_scrapes(query, sources):
+        return {}
+
+    async def cache_scrapes(query, results_by_source):
+        return results_by_source
+
+    monkeypatch.setattr(general, "get_cached_scrapes", get_cached_scrapes)
+    monkeypatch.setattr(general, "cache_scrapes", cache_scrapes)
+    monkeypatch.setattr(settings, "INDEXER_MANAGER_API_KEY", "test")
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_FAILURES", 0)
+    # Restored after the test, search points it at the stand-in
+    monkeypatch.setattr(settings, "INDEXER_MANAGER_URL", settings.INDEXER_MANAGER_URL)
+    return monkeypatch
+
+
+async def search(stand_in: JackettStandIn, queries: list):
+    settings.INDEXER_MANAGER_URL = await stand_in.start()
+    session = http_client.scoped("indexer")
+    latencies = []
+
+    async def timed(query):
+        start = time.perf_counter()
+        results = await general.get_indexer_manager(session, "jackett", TRACKERS, query, {"debridService": "realdebrid"})
+        latencies.append(time.perf_counter() - start)
+        return results
+
+    try:
+        results = await asyncio.gather(*(timed(query) for query in queries))
+    finally:
+        await http_client.close()
+        await stand_in.runner.cleanup()
+    return results, sorted(latencies)
+
+
+def test_slow_tracker_keeps_the_search_within_its_timeout(jackett_settings):
+    jackett_settings.setattr(settings, "JACKETT_BATCH_TRACKERS", True)
+    jackett_settings.setattr(settings, "INDEXER_MANAGER_TIMEOUT", 1)
+    stand_in = JackettStandIn({**{tracker: 0.05 for tracker in TRACKERS}, "echo": 2})
+
+    (results,), (elapsed,) = asyncio.run(search(stand_in, ["Show"]))
+
+    # The batch gives up after half the timeout, the fast trackers answer in the retries
+    assert elapsed < 1.3
+    assert {result["TrackerId"] for result in results} == set(TRACKERS) - {"echo"}
+    assert stand_in.requests == 1 + len(TRACKERS)
+
+
+@pytest.mark.skipif(not os.getenv("COMET_BENCHMARK"), reason="set COMET_BENCHMARK=1 to run the benchmarks")
+@pytest.mark.parametrize("batch", [False, True], ids=["per-indexer", "batched"])
+def test_jackett_request_count_and_tail_latency(jackett_settings, batch):
+    jackett_settings.setattr(settings, "JACKETT_BATCH_TRACKERS", batch)
+    jackett_settings.setattr(settings, "INDEXER_MANAGER_TIMEOUT", 5)
+    delays = {"alpha": 0.05, "bravo": 0.1, "charlie": 0.15, "delta": 0.2, "echo": 0.4}
+    stand_in = JackettStandIn(delays)
+    queries = [f"Show {i}" for i in range(4)]
+
+    results, latencies = asyncio.run(search(stand_in, queries))
+
+    print(
+        f"{'batched' if batch else 'per-indexer'}: {stand_in.requests} requests, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, max {latencies[-1] * 1000:.0f}ms"
+    )
+    assert all(len(query_results) == len(TRACKERS) for query_results in results)
+    assert stand_in.requests == (len(queries) if batch else len(queries) * len(TRACKERS))
+    assert latencies[-1] < max(delays.values()) + 0.5
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import socket
+import tracemalloc
+
+import orjson
+import pytest
+from aiohttp import web
+
+from comet.utils.general import normalize_prowlarr_result
+from comet.utils.http import http_client
+from comet.utils.json_stream import iter_json_array
+
+
+class ChunkedContent:
+    # Stands in for an aiohttp StreamReader returning at most `chunk_size` bytes per read
+    def __init__(self, body: bytes, chunk_size: int):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    async def read(self, n: int = -1):
+        size = self.chunk_size if n < 0 else min(n, self.chunk_size)
+        chunk = self.body[self.position : self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+
+def parse(body: bytes, chunk_size: int, max_items: int = 0):
+    async def collect():
+        return [item async for item in iter_json_array(ChunkedContent(body, chunk_size), max_items)]
+
+    return asyncio.run(collect())
+
+
+tricky_items = [
+    {"title": "Show } S01E01", "size": 1},
+    {"title": 'He said \"}\" and left {', "size": 2},
+    {"title": "Back\\slash \\\\} end\\", "nested": {"a": {"b": "}}"}, "list": [{"c": "]"}]}},
+    {"title": "Ünïcødé ✓ }", "size": 3, "empty": {}},
+    {},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+def test_iter_json_array_matches_orjson(chunk_size):
+    body = orjson.dumps(tricky_items)
+    assert parse(body, chunk_size) == tricky_items
+
+
+def test_iter_json_array_handles_whitespace_and_stops_at_max_items():
+    body = b' \n[ \r\n' + b' ,\n '.join(orjson.dumps(item) for item in tricky_items) + b'\n]\n'
+    assert parse(body, 3) == tricky_items
+    assert parse(body, 3, max_items=2) == tricky_items[:2]
+    assert parse(b"[]", 1) == []
+
+
+@pytest.mark.parametrize("body", [b"", b"{}", b"[1, 2]", b'[{"title": "cut', b'[{"a": 1}'])
+def test_iter_json_array_rejects_invalid_input(body):
+    with pytest.raises(ValueError):
+        parse(body, 4)
+
+
+def prowlarr_fixture(count: int):
+    return orjson.dumps(
+        [
+            {
+                "guid": f"https://tracker.example/torrent/{i}",
+                "title": f"Synthetic Show S01E{i % 24 + 1:02d} 1080p WEB-DL x264-GROUP {i}",
+                "infoHash": hashlib.sha1(str(i).encode()).hexdigest(),
+                "size": 1_000_000 + i,
+                "downloadUrl": f"http://prowlarr:9696/1/download?apikey=x&link={i}",
+                "indexer": f"Indexer {i % 5}",
+                "indexerId": i % 5,
+                "protocol": "torrent",
+                "seeders": i % 100,
+                "leechers": i % 10,
+                "categories": [{"id": 5000, "name": "TV", "subCategories": []}],
+                "publishDate": "2024-01-01T00:00:00Z",
+                "infoUrl": f"https://tracker.example/details/{i}",
+            }
+            for i in range(count)
+        ]
+    )
+
+
+async def measure_search(body: bytes, streaming: bool, max_items: int = 0):
+    async def search(request: web.Request):
+        # Written in slices with backpressure so the stand-in does not buffer the body while traced
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        view = memoryview(body)
+        for start in range(0, len(body), 64 * 1024):
+            await response.write(view[start : start + 64 * 1024])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/api/v1/search", search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    try:
+        tracemalloc.start()
+        response = await http_client.session.get(f"http://127.0.0.1:{port}/api/v1/search")
+        if streaming:
+            results = [
+                normalize_prowlarr_result(result)
+                async for result in iter_json_array(response.content, max_items)
+            ]
+            response.release()
+        else:
+            results = [normalize_prowlarr_result(result) for result in await response.json()]
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return len(results), peak
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.skipif(not os.getenv("COMET_BENCHMARK"), reason="set COMET_BENCHMARK=1 to run the benchmarks")
+def test_streaming_memory_on_a_50k_result_search():
+    body = prowlarr_fixture(50_000)
+
+    full_count, full_peak = asyncio.run(measure_search(body, streaming=False))
+    stream_count, stream_peak = asyncio.run(measure_search(body, streaming=True))
+    capped_count, capped_peak = asyncio.run(measure_search(body, streaming=True, max_items=10_000))
+
+    mib = 1024 * 1024
+    print(
+        f"\n{len(body) / mib:.1f} MiB body, tracemalloc peak: response.json() {full_peak / mib:.1f} MiB, "
+        f"streaming {stream_peak / mib:.1f} MiB, streaming capped at 10000 {capped_peak / mib:.1f} MiB"
+    )
+    assert full_count == stream_count == 50_000
+    assert capped_count == 10_000
+    assert stream_peak < full_peak / 2
+    assert capped_peak < stream_peak
@@ -0,0 +1,94 @@
+import asyncio
+import socket
+import time
+
+from aiohttp import web
+
+from comet.utils.general import get_scraper_json
+from comet.utils.http import http_client
+
+SCRAPE_DELAY = 1
+
+
+async def slow_stream(request: web.Request):
+    await asyncio.sleep(SCRAPE_DELAY)
+    return web.json_response({"streams": [{"title": "Slow Show S01E01 1080p"}]})
+
+
+async def ping(request: web.Request):
+    return web.json_response({"ok": True})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_stand_in():
+    # The stand-in runs on the same event loop, a blocking scrape would stall it too
+    app = web.Application()
+    app.router.add_get("/stream/series/tt0000001.json", slow_stream)
+    app.router.add_get("/ping", ping)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, port
+
+
+async def serve_while_scraping():
+    runner, port = await start_stand_in()
+    try:
+        start = time.perf_counter()
+        scrapes = [
+            asyncio.create_task(get_scraper_json(f"http://127.0.0.1:{port}/stream/series/tt0000001.json"))
+            for _ in range(3)
+        ]
+
+        ping_latencies = []
+        while not all(scrape.done() for scrape in scrapes):
+            ping_start = time.perf_counter()
+            response = await http_client.session.get(f"http://127.0.0.1:{port}/ping")
+            assert (await response.json()) == {"ok": True}
+            ping_latencies.append(time.perf_counter() - ping_start)
+            await asyncio.sleep(0.05)
+
+        results = await asyncio.gather(*scrapes)
+        return results, time.perf_counter() - start, ping_latencies
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+def test_scrapes_do_not_block_other_requests():
+    results, elapsed, ping_latencies = asyncio.run(serve_while_scraping())
+
+    assert all(result["streams"][0]["title"] == "Slow Show S01E01 1080p" for result in results)
+    # The three scrapes overlap instead of running one after the other
+    assert elapsed < SCRAPE_DELAY * 2
+    # Other requests kept being answered while the scrapes were in flight
+    assert len(ping_latencies) >= 5
+    assert max(ping_latencies) < SCRAPE_DELAY / 2
+
+
+async def scrape_with_deadline(deadline: float):
+    runner, port = await start_stand_in()
+    try:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(deadline):
+                await get_scraper_json(f"http://127.0.0.1:{port}/stream/series/tt0000001.json")
+        except TimeoutError:
+            return True, time.perf_counter() - start
+        return False, time.perf_counter() - start
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+def test_scrape_cancellation_is_not_retried_through_the_proxy():
+    timed_out, elapsed = asyncio.run(scrape_with_deadline(0.2))
+
+    assert timed_out
+    assert elapsed < SCRAPE_DELAY / 2
@@ -0,0 +1,51 @@
+import os
+import time
+
+import orjson
+import pytest
+
+from comet.utils import general
+from comet.utils.general import derive_key, short_decrypt, short_encrypt
+
+config = orjson.dumps(
+    {
+        "indexers": ["yts", "eztv", "thepiratebay"],
+        "maxResults": 0,
+        "resolutions": ["All"],
+        "languages": ["All"],
+        "debridService": "realdebrid",
+        "debridApiKey": "X" * 52,
+    }
+).decode()
+
+
+def test_rotated_token_gets_its_own_key():
+    old_payload = short_encrypt(config, "old token")
+    new_payload = short_encrypt(config, "new token")
+
+    assert derive_key("old token") != derive_key("new token")
+    assert short_decrypt(old_payload, "old token") == config
+    assert short_decrypt(new_payload, "new token") == config
+
+
+def stream_response_cost(rounds: int):
+    # What one 50-result stream response costs: the config is decrypted once, then encrypted per stream
+    payload = short_encrypt(config, "benchmark token")
+    start = time.perf_counter()
+    for _ in range(rounds):
+        short_decrypt(payload, "benchmark token")
+        for _ in range(50):
+            short_encrypt(config, "benchmark token")
+    return (time.perf_counter() - start) / rounds
+
+
+@pytest.mark.skipif(not os.getenv("COMET_BENCHMARK"), reason="set COMET_BENCHMARK=1 to run the benchmarks")
+def test_key_derivation_cost_per_stream_response(monkeypatch):
+    memoized = stream_response_cost(rounds=100)
+    with monkeypatch.context() as patch:
+        # Every call runs PBKDF2 again, as before the key was memoized
+        patch.setattr(general, "derive_key", derive_key.__wrapped__)
+        uncached = stream_response_cost(rounds=2)
+
+    print(f"\n1 short_decrypt + 50 short_encrypt: {uncached * 1000:.1f}ms uncached, {memoized * 1000:.2f}ms memoized")
+    assert memoized * 10 < uncached